@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Detector latency benchmark
+- Times auto_detect_minimap_final, detect_pokemon_markers, detect_creeps,
+  detect_objectives and cluster_positions on the bundled fixtures
+- Native fixtures plus 1080p / 1440p / 4K upscaled variants
+- Reports p50/p95/p99 and throughput, saves a JSON baseline and exits
+  non-zero when a case regresses past the threshold
+
+Usage:
+    python benchmark.py --save benchmark_baseline.json
+    python benchmark.py --compare benchmark_baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from pokemon_detector import detect_pokemon_markers
+from creep_objective_detector_final_v2 import detect_creeps, detect_objectives, cluster_positions
+from minimap_detector_final import auto_detect_minimap_final
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+SCREENSHOT_FIXTURES = ['screenshot_exact_minimap.png']
+MINIMAP_FIXTURES = ['minimap_final.png', 'MINIMAP_EXACT.png', 'MINIMAP_WITH_DETECTIONS.png']
+
+# Display heights; fixtures are treated as captured at 1080p
+RESOLUTIONS = {'1080p': (1920, 1080), '1440p': (2560, 1440), '4k': (3840, 2160)}
+
+CLUSTER_FRAMES = 600  # one 10 minute match at 1 FPS
+
+
+def load_fixture(name):
+    img = cv2.imread(str(FIXTURE_DIR / name))
+    if img is None:
+        raise FileNotFoundError(f"Missing fixture: {name}")
+    return img
+
+
+def build_cases():
+    """(case_name, fn, arg) for every detector x fixture x resolution"""
+    cases = []
+    
+    detect_pyramid = lambda img: auto_detect_minimap_final(img, pyramid_levels=2)
+    detect_components = lambda img: detect_pokemon_markers(img, engine='components')
+    
+    for name in SCREENSHOT_FIXTURES:
+        img = load_fixture(name)
+        variants = [('native', img)]
+        for res, size in RESOLUTIONS.items():
+            variants.append((res, cv2.resize(img, size, interpolation=cv2.INTER_LINEAR)))
+        
+        for res, variant in variants:
+            cases.append((f'auto_detect_minimap_final/{name}/{res}', auto_detect_minimap_final, variant))
+            cases.append((f'auto_detect_minimap_final[pyramid2]/{name}/{res}', detect_pyramid, variant))
+    
+    for name in MINIMAP_FIXTURES:
+        img = load_fixture(name)
+        variants = [('native', img)]
+        for res, (_, height) in RESOLUTIONS.items():
+            scale = height / 1080
+            if scale != 1.0:
+                variants.append((res, cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)))
+        
+        for res, variant in variants:
+            cases.append((f'detect_pokemon_markers/{name}/{res}', detect_pokemon_markers, variant))
+            cases.append((f'detect_pokemon_markers[components]/{name}/{res}', detect_components, variant))
+            cases.append((f'detect_creeps/{name}/{res}', detect_creeps, variant))
+            cases.append((f'detect_objectives/{name}/{res}', detect_objectives, variant))
+    
+    # A match worth of creep detections: fixture creeps jittered over many frames
+    rng = np.random.default_rng(0)
+    base = detect_creeps(load_fixture(MINIMAP_FIXTURES[0]))
+    detections = []
+    for frame in range(CLUSTER_FRAMES):
+        for c in base:
+            dx, dy = rng.integers(-2, 3, size=2)
+            detections.append({'position': (c['position'][0] + int(dx), c['position'][1] + int(dy)),
+                               'radius': c['radius'], 'frame': frame})
+    cases.append((f'cluster_positions/{len(detections)}_detections', cluster_positions, detections))
+    
+    return cases
+
+
+def time_case(fn, arg, repeat, warmup):
+    for _ in range(warmup):
+        fn(arg)
+    
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    
+    samples = np.array(samples) * 1000.0
+    return {
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'mean_ms': float(samples.mean()),
+        'throughput_per_s': float(1000.0 / samples.mean()) if samples.mean() > 0 else 0.0,
+        'repeat': repeat
+    }
+
+
+def run(repeat, warmup, only=None):
+    results = {}
+    for name, fn, arg in build_cases():
+        if only and only not in name:
+            continue
+        # Clustering is much slower per call; fewer repeats keep runs short
+        n = max(3, repeat // 10) if name.startswith('cluster_positions') else repeat
+        results[name] = time_case(fn, arg, n, warmup)
+        r = results[name]
+        print(f"{name:70s} p50 {r['p50_ms']:9.2f}ms  p95 {r['p95_ms']:9.2f}ms  "
+              f"p99 {r['p99_ms']:9.2f}ms  {r['throughput_per_s']:9.1f}/s")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Cases whose p50 grew by more than threshold (fraction) over baseline"""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or base['p50_ms'] <= 0:
+            continue
+        change = r['p50_ms'] / base['p50_ms'] - 1.0
+        if change > threshold:
+            regressions.append((name, base['p50_ms'], r['p50_ms'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detector latency benchmark")
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--only', help="run cases whose name contains this string")
+    parser.add_argument('--save', help="write results as a JSON baseline")
+    parser.add_argument('--compare', help="baseline JSON to check against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    results = run(args.repeat, args.warmup, args.only)
+    
+    if args.save:
+        report = {
+            'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': results
+        }
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Baseline saved: {args.save}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for name, old, new, change in regressions:
+                print(f"   {name}: {old:.2f}ms -> {new:.2f}ms (+{change:.0%})")
+            return 1
+        print(f"\n✅ No regressions over {args.threshold:.0%}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,11 +4,19 @@ FINAL V2 Creep and Objective Detector
 - Improved creep clustering (3.5x radius zone)
 - Only detects INSIDE minimap oval (no off-map detections)
 - Better deduplication
+- Incremental mode: only tiles that changed since the last frame are re-detected
+- Batch variants over (N, H, W, 3) stacks of crops
 """
 
 import cv2
+import math
 import numpy as np
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Tuple
+
+from instrumentation import stage, incr
+from pixel_labels import LABEL_CREEP, LABEL_OBJECTIVE, class_mask
+from detection_store import CREEP_DTYPE, OBJECTIVE_DTYPE
 
 # Creep detection - broader yellow range
 CREEP_HSV_LOWER = [10, 20, 120]
@@ -26,14 +34,26 @@ OBJ_MAX_AREA = 500
 # Clustering - 3.5x radius zone
 CLUSTER_RADIUS_MULTIPLIER = 3.5
 
+# Incremental detection - frame differencing on a tile grid
+DIFF_TILE_SIZE = 32
+DIFF_THRESHOLD = 24  # per-channel change that counts as a changed pixel
+DIFF_MIN_PIXELS = 3  # changed pixels that mark a tile dirty
+DIFF_FULL_PASS_FRACTION = 0.5  # above this share of dirty tiles, redo the whole frame
+DIFF_FULL_PASS_INTERVAL = 30  # frames between forced full passes (bounds any drift)
+
 
 def get_minimap_mask(minimap_img: np.ndarray) -> np.ndarray:
     """
     Create a mask of the actual minimap oval to exclude off-map detections
     The minimap is an oval shape, we need to mask out areas outside it
+    Masks are cached by image size (the returned array is read-only)
     """
     height, width = minimap_img.shape[:2]
-    
+    return _minimap_mask_for_shape(height, width)
+
+
+@lru_cache(maxsize=16)
+def _minimap_mask_for_shape(height: int, width: int) -> np.ndarray:
     # Create mask - start with all black
     mask = np.zeros((height, width), dtype=np.uint8)
     
@@ -49,33 +69,18 @@ def get_minimap_mask(minimap_img: np.ndarray) -> np.ndarray:
     # Draw filled ellipse (this is the playable area)
     cv2.ellipse(mask, (center_x, center_y), (axes_x, axes_y), 0, 0, 360, 255, -1)
     
+    mask.flags.writeable = False
     return mask
 
 
-def detect_creeps(minimap_img: np.ndarray) -> List[Dict]:
-    """
-    Detect creep camps - tiny yellow/brown dots
-    Only detects INSIDE the minimap oval
-    """
-    hsv = cv2.cvtColor(minimap_img, cv2.COLOR_BGR2HSV)
-    height, width = minimap_img.shape[:2]
-    
-    # Get minimap mask (only detect inside oval)
-    minimap_mask = get_minimap_mask(minimap_img)
-    
-    # Find yellow regions
-    lower = np.array(CREEP_HSV_LOWER)
-    upper = np.array(CREEP_HSV_UPPER)
-    yellow_mask = cv2.inRange(hsv, lower, upper)
-    
-    # Apply minimap mask - only keep detections INSIDE the oval
-    yellow_mask = cv2.bitwise_and(yellow_mask, minimap_mask)
-    
-    # Clean morphology (very gentle)
-    kernel = np.ones((2, 2), np.uint8)
-    yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_OPEN, kernel, iterations=1)
-    
-    # Blob detection
+def _roi_slices(roi, width: int, height: int) -> Tuple[int, int, slice]:
+    """Origin and numpy slices of an (x0, y0, x1, y1) region, whole frame for None"""
+    x0, y0, x1, y1 = (int(v) for v in roi) if roi is not None else (0, 0, width, height)
+    return x0, y0, np.s_[y0:y1, x0:x1]
+
+
+def create_creep_blob_detector():
+    """SimpleBlobDetector for the cleaned creep mask"""
     params = cv2.SimpleBlobDetector_Params()
     params.filterByColor = True
     params.blobColor = 255
@@ -87,20 +92,29 @@ def detect_creeps(minimap_img: np.ndarray) -> List[Dict]:
     params.filterByConvexity = False
     params.filterByInertia = False
     
-    detector = cv2.SimpleBlobDetector_create(params)
-    keypoints = detector.detect(yellow_mask)
-    
+    return cv2.SimpleBlobDetector_create(params)
+
+
+def creeps_from_keypoints(keypoints, minimap_mask: np.ndarray, width: int, height: int,
+                          x0: int = 0, y0: int = 0) -> Tuple[List[Dict], int, int]:
+    """
+    Creep dicts from blob keypoints, (x0, y0) added to move them into frame coordinates
+    Returns (creeps, rejected_mask, rejected_border)
+    """
     creeps = []
+    rejected_mask = rejected_border = 0
     
     for kp in keypoints:
-        cx, cy = int(kp.pt[0]), int(kp.pt[1])
+        cx, cy = int(kp.pt[0]) + x0, int(kp.pt[1]) + y0
         radius = int(kp.size / 2)
         
         # Extra check: is this point inside the mask?
         if minimap_mask[cy, cx] == 0:
+            rejected_mask += 1
             continue
         
         if cx < 3 or cy < 3 or cx >= width - 3 or cy >= height - 3:
+            rejected_border += 1
             continue
         
         size = "small" if radius <= 5 else "medium"
@@ -111,44 +125,110 @@ def detect_creeps(minimap_img: np.ndarray) -> List[Dict]:
             'size': size
         })
     
-    return creeps
+    return creeps, rejected_mask, rejected_border
 
 
-def detect_objectives(minimap_img: np.ndarray) -> List[Dict]:
+def creep_records_from_keypoints(keypoints, minimap_mask: np.ndarray, width: int, height: int,
+                                 frame_idx: int = 0, x0: int = 0, y0: int = 0) -> Tuple[np.ndarray, int, int]:
     """
-    Detect objectives - bright yellow icons
+    creeps_from_keypoints as a CREEP_DTYPE array, filtered column-wise
+    Returns (records, rejected_mask, rejected_border)
+    """
+    if len(keypoints) == 0:
+        return np.zeros(0, dtype=CREEP_DTYPE), 0, 0
+    
+    points = cv2.KeyPoint_convert(keypoints)
+    cx = points[:, 0].astype(np.int64) + x0
+    cy = points[:, 1].astype(np.int64) + y0
+    radius = (np.array([kp.size for kp in keypoints]) / 2).astype(np.int64)
+    
+    inside = minimap_mask[cy, cx] != 0
+    border = (cx < 3) | (cy < 3) | (cx >= width - 3) | (cy >= height - 3)
+    keep = inside & ~border
+    
+    records = np.zeros(int(keep.sum()), dtype=CREEP_DTYPE)
+    records['frame'] = frame_idx
+    records['x'] = cx[keep]
+    records['y'] = cy[keep]
+    records['radius'] = np.maximum(radius[keep], 2)
+    records['medium'] = radius[keep] > 5
+    return records, int((~inside).sum()), int((inside & border).sum())
+
+
+def detect_creeps(minimap_img: np.ndarray, context=None, roi=None,
+                  as_records: bool = False, frame_idx: int = 0):
+    """
+    Detect creep camps - tiny yellow/brown dots
     Only detects INSIDE the minimap oval
+    Pass a FrameContext to reuse its HSV conversion (or label image) and oval mask
+    roi (x0, y0, x1, y1) limits detection to that region, in frame coordinates
+    as_records returns a CREEP_DTYPE array tagged with frame_idx instead of dicts
     """
-    hsv = cv2.cvtColor(minimap_img, cv2.COLOR_BGR2HSV)
     height, width = minimap_img.shape[:2]
+    x0, y0, region = _roi_slices(roi, width, height)
+    
+    with stage('creeps.convert'):
+        if context is not None:
+            minimap_mask = context.minimap_mask
+            hsv = None if context.use_labels else context.hsv[region]
+        else:
+            hsv = cv2.cvtColor(minimap_img[region], cv2.COLOR_BGR2HSV)
+            minimap_mask = get_minimap_mask(minimap_img)
+    
+    with stage('creeps.threshold'):
+        # Find yellow regions
+        if hsv is None:
+            yellow_mask = context.class_mask(LABEL_CREEP)[region]
+        else:
+            lower = np.array(CREEP_HSV_LOWER)
+            upper = np.array(CREEP_HSV_UPPER)
+            yellow_mask = cv2.inRange(hsv, lower, upper)
+        
+        # Apply minimap mask - only keep detections INSIDE the oval
+        yellow_mask = cv2.bitwise_and(yellow_mask, minimap_mask[region])
+        
+        # Clean morphology (very gentle)
+        kernel = np.ones((2, 2), np.uint8)
+        yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_OPEN, kernel, iterations=1)
     
-    # Get minimap mask
-    minimap_mask = get_minimap_mask(minimap_img)
-    
-    lower = np.array(OBJ_HSV_LOWER)
-    upper = np.array(OBJ_HSV_UPPER)
-    yellow_mask = cv2.inRange(hsv, lower, upper)
-    
-    # Apply minimap mask
-    yellow_mask = cv2.bitwise_and(yellow_mask, minimap_mask)
+    # Blob detection
+    with stage('creeps.blobs'):
+        keypoints = create_creep_blob_detector().detect(yellow_mask)
     
-    kernel = np.ones((3, 3), np.uint8)
-    yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_CLOSE, kernel)
+    if as_records:
+        creeps, rejected_mask, rejected_border = creep_records_from_keypoints(keypoints, minimap_mask, width, height,
+                                                                              frame_idx, x0, y0)
+    else:
+        creeps, rejected_mask, rejected_border = creeps_from_keypoints(keypoints, minimap_mask, width, height, x0, y0)
     
-    contours, _ = cv2.findContours(yellow_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    incr('creeps.blobs', len(keypoints))
+    incr('creeps.rejected_mask', rejected_mask)
+    incr('creeps.rejected_border', rejected_border)
     
-    objectives = []
+    return creeps
+
+
+def _objective_rows(contours, minimap_mask: np.ndarray, width: int,
+                    height: int) -> Tuple[List[Tuple], int, int]:
+    """
+    (cx, cy, area, x, y, w, h) per accepted contour (in frame coordinates)
+    Returns (rows, rejected_area, rejected_aspect)
+    """
+    rows = []
+    rejected_area = rejected_aspect = 0
     
     for contour in contours:
         area = cv2.contourArea(contour)
         
         if area < OBJ_MIN_AREA or area > OBJ_MAX_AREA:
+            rejected_area += 1
             continue
         
         x, y, w, h = cv2.boundingRect(contour)
         aspect_ratio = w / h if h > 0 else 0
         
         if aspect_ratio < 0.5 or aspect_ratio > 2.0:
+            rejected_aspect += 1
             continue
         
         M = cv2.moments(contour)
@@ -165,55 +245,473 @@ def detect_objectives(minimap_img: np.ndarray) -> List[Dict]:
         if cx < 10 or cy < 10 or cx >= width - 10 or cy >= height - 10:
             continue
         
-        objectives.append({
-            'position': (cx, cy),
-            'area': area,
-            'bbox': (x, y, w, h)
-        })
+        rows.append((cx, cy, area, x, y, w, h))
+    
+    return rows, rejected_area, rejected_aspect
+
+
+def objectives_from_contours(contours, minimap_mask: np.ndarray, width: int,
+                             height: int) -> Tuple[List[Dict], int, int]:
+    """
+    Objective dicts from mask contours (in frame coordinates)
+    Returns (objectives, rejected_area, rejected_aspect)
+    """
+    rows, rejected_area, rejected_aspect = _objective_rows(contours, minimap_mask, width, height)
+    objectives = [{'position': (cx, cy), 'area': area, 'bbox': (x, y, w, h)}
+                  for cx, cy, area, x, y, w, h in rows]
+    return objectives, rejected_area, rejected_aspect
+
+
+def objective_records_from_contours(contours, minimap_mask: np.ndarray, width: int, height: int,
+                                    frame_idx: int = 0) -> Tuple[np.ndarray, int, int]:
+    """
+    objectives_from_contours as an OBJECTIVE_DTYPE array
+    Returns (records, rejected_area, rejected_aspect)
+    """
+    rows, rejected_area, rejected_aspect = _objective_rows(contours, minimap_mask, width, height)
+    records = np.array([(frame_idx, *row) for row in rows], dtype=OBJECTIVE_DTYPE)
+    return records, rejected_area, rejected_aspect
+
+
+def detect_objectives(minimap_img: np.ndarray, context=None, roi=None,
+                      as_records: bool = False, frame_idx: int = 0):
+    """
+    Detect objectives - bright yellow icons
+    Only detects INSIDE the minimap oval
+    Pass a FrameContext to reuse its HSV conversion (or label image) and oval mask
+    roi (x0, y0, x1, y1) limits detection to that region, in frame coordinates
+    as_records returns an OBJECTIVE_DTYPE array tagged with frame_idx instead of dicts
+    """
+    height, width = minimap_img.shape[:2]
+    x0, y0, region = _roi_slices(roi, width, height)
+    
+    with stage('objectives.convert'):
+        if context is not None:
+            minimap_mask = context.minimap_mask
+            hsv = None if context.use_labels else context.hsv[region]
+        else:
+            hsv = cv2.cvtColor(minimap_img[region], cv2.COLOR_BGR2HSV)
+            minimap_mask = get_minimap_mask(minimap_img)
+    
+    with stage('objectives.threshold'):
+        if hsv is None:
+            yellow_mask = context.class_mask(LABEL_OBJECTIVE)[region]
+        else:
+            lower = np.array(OBJ_HSV_LOWER)
+            upper = np.array(OBJ_HSV_UPPER)
+            yellow_mask = cv2.inRange(hsv, lower, upper)
+        
+        # Apply minimap mask
+        yellow_mask = cv2.bitwise_and(yellow_mask, minimap_mask[region])
+        
+        kernel = np.ones((3, 3), np.uint8)
+        yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_CLOSE, kernel)
+    
+    with stage('objectives.contours'):
+        contours, _ = cv2.findContours(yellow_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=(x0, y0))
+    
+    if as_records:
+        objectives, rejected_area, rejected_aspect = objective_records_from_contours(contours, minimap_mask,
+                                                                                     width, height, frame_idx)
+    else:
+        objectives, rejected_area, rejected_aspect = objectives_from_contours(contours, minimap_mask, width, height)
+    
+    incr('objectives.contours', len(contours))
+    incr('objectives.rejected_area', rejected_area)
+    incr('objectives.rejected_aspect', rejected_aspect)
     
     return objectives
 
 
+def _batch_masks(frames: np.ndarray, hsv: np.ndarray, lower, upper,
+                 labels: np.ndarray = None, bit: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Thresholded, oval-masked stack as one tall (N * H, W) image, plus the oval
+    The class comes from the label image when given, else from HSV thresholds.
+    The oval leaves a blank margin on every side, so frames stacked edge to
+    edge never touch: morphology, blobs and contours on the tall image match
+    running them frame by frame
+    """
+    count, height, width = frames.shape[:3]
+    minimap_mask = _minimap_mask_for_shape(height, width)
+    
+    if labels is not None:
+        mask = class_mask(labels.reshape(count * height, width), bit)
+    else:
+        if hsv is None:
+            hsv = cv2.cvtColor(frames.reshape(count * height, width, 3), cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv.reshape(count * height, width, 3), np.array(lower), np.array(upper))
+    np.bitwise_and(mask.reshape(count, height, width), minimap_mask, out=mask.reshape(count, height, width))
+    
+    return mask, minimap_mask
+
+
+def detect_creeps_batch(frames: np.ndarray, hsv: np.ndarray = None,
+                        labels: np.ndarray = None, frame_indices: List[int] = None) -> List:
+    """
+    detect_creeps over an (N, H, W, 3) stack of same-size crops
+    Threshold and morphology run once on the whole stack
+    Returns one creep list per frame, or with frame_indices one CREEP_DTYPE
+    array per frame tagged with its index
+    """
+    count, height, width = frames.shape[:3]
+    if count == 0:
+        return []
+    
+    with stage('creeps.threshold'):
+        yellow_mask, minimap_mask = _batch_masks(frames, hsv, CREEP_HSV_LOWER, CREEP_HSV_UPPER,
+                                                 labels, LABEL_CREEP)
+        yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8), iterations=1)
+    
+    # Blob detection per frame: SimpleBlobDetector groups blobs pairwise,
+    # so one call on the tall image costs more than N small ones
+    with stage('creeps.blobs'):
+        detector = create_creep_blob_detector()
+        keypoints = [detector.detect(frame_mask) for frame_mask in yellow_mask.reshape(count, height, width)]
+    
+    results = []
+    rejected_mask = rejected_border = 0
+    for i, frame_keypoints in enumerate(keypoints):
+        if frame_indices is not None:
+            creeps, mask_rejects, border_rejects = creep_records_from_keypoints(frame_keypoints, minimap_mask,
+                                                                                width, height, frame_indices[i])
+        else:
+            creeps, mask_rejects, border_rejects = creeps_from_keypoints(frame_keypoints, minimap_mask, width, height)
+        rejected_mask += mask_rejects
+        rejected_border += border_rejects
+        results.append(creeps)
+    
+    incr('creeps.blobs', sum(len(k) for k in keypoints))
+    incr('creeps.rejected_mask', rejected_mask)
+    incr('creeps.rejected_border', rejected_border)
+    
+    return results
+
+
+def detect_objectives_batch(frames: np.ndarray, hsv: np.ndarray = None,
+                            labels: np.ndarray = None, frame_indices: List[int] = None) -> List:
+    """
+    detect_objectives over an (N, H, W, 3) stack of same-size crops
+    Threshold, morphology and contour extraction run once on the whole stack
+    Returns one objective list per frame, or with frame_indices one
+    OBJECTIVE_DTYPE array per frame tagged with its index
+    """
+    count, height, width = frames.shape[:3]
+    if count == 0:
+        return []
+    
+    with stage('objectives.threshold'):
+        yellow_mask, minimap_mask = _batch_masks(frames, hsv, OBJ_HSV_LOWER, OBJ_HSV_UPPER,
+                                                 labels, LABEL_OBJECTIVE)
+        yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+    
+    with stage('objectives.contours'):
+        contours, _ = cv2.findContours(yellow_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    # Back to per-frame coordinates (a contour never spans two frames)
+    per_frame = [[] for _ in range(count)]
+    for contour in contours:
+        i = int(contour[0, 0, 1]) // height
+        per_frame[i].append(contour - np.array([0, i * height], dtype=contour.dtype))
+    
+    results = []
+    rejected_area = rejected_aspect = 0
+    for i, frame_contours in enumerate(per_frame):
+        if frame_indices is not None:
+            objectives, area_rejects, aspect_rejects = objective_records_from_contours(
+                frame_contours, minimap_mask, width, height, frame_indices[i])
+        else:
+            objectives, area_rejects, aspect_rejects = objectives_from_contours(frame_contours, minimap_mask,
+                                                                               width, height)
+        rejected_area += area_rejects
+        rejected_aspect += aspect_rejects
+        results.append(objectives)
+    
+    incr('objectives.contours', len(contours))
+    incr('objectives.rejected_area', rejected_area)
+    incr('objectives.rejected_aspect', rejected_aspect)
+    
+    return results
+
+
+class SpatialClusterer:
+    """
+    Incremental centroid clustering behind a uniform grid
+    Keeps running position sums per cluster and buckets clusters by the grid
+    cell of their current centroid, so each detection only looks at nearby
+    clusters instead of every cluster ever created
+    """
+    
+    def __init__(self, cell_size: float = 3 * CLUSTER_RADIUS_MULTIPLIER):
+        self.cell_size = cell_size
+        self.sum_x = []
+        self.sum_y = []
+        self.counts = []
+        self.cells = []
+        self.grid = {}
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+    
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+    
+    def centroid(self, cid: int) -> Tuple[float, float]:
+        n = self.counts[cid]
+        return self.sum_x[cid] / n, self.sum_y[cid] / n
+    
+    def find(self, pos, cluster_dist: float):
+        """Oldest cluster whose centroid is within cluster_dist of pos, else None"""
+        gx, gy = self._cell(pos[0], pos[1])
+        reach = int(math.ceil(cluster_dist / self.cell_size))
+        
+        best = None
+        for cx in range(gx - reach, gx + reach + 1):
+            for cy in range(gy - reach, gy + reach + 1):
+                for cid in self.grid.get((cx, cy), ()):
+                    if best is not None and cid > best:
+                        continue
+                    avg_x, avg_y = self.centroid(cid)
+                    distance = math.sqrt((pos[0] - avg_x)**2 + (pos[1] - avg_y)**2)
+                    if distance <= cluster_dist:
+                        best = cid
+        return best
+    
+    def add(self, pos, radius: float = 3) -> int:
+        """Assign pos to a cluster (creating one if needed), return its id"""
+        # Cluster distance is 3.5x the radius of this detection
+        cluster_dist = radius * CLUSTER_RADIUS_MULTIPLIER
+        cid = self.find(pos, cluster_dist)
+        
+        if cid is None:
+            cid = len(self.counts)
+            self.sum_x.append(pos[0])
+            self.sum_y.append(pos[1])
+            self.counts.append(1)
+            cell = self._cell(pos[0], pos[1])
+            self.cells.append(cell)
+            self.grid.setdefault(cell, []).append(cid)
+            return cid
+        
+        self.sum_x[cid] += pos[0]
+        self.sum_y[cid] += pos[1]
+        self.counts[cid] += 1
+        
+        # Move the cluster to its centroid's new cell
+        cell = self._cell(*self.centroid(cid))
+        if cell != self.cells[cid]:
+            self.grid[self.cells[cid]].remove(cid)
+            self.grid.setdefault(cell, []).append(cid)
+            self.cells[cid] = cell
+        return cid
+
+
 def cluster_positions(detections: List[Dict], distance_threshold: int = None) -> Dict[int, List[Dict]]:
     """
     Cluster detections using 3.5x radius zone
     Anything within 3.5x the detected radius is considered the same creep
+    Each detection joins the oldest cluster whose mean is in range
     """
     if not detections:
         return {}
     
     detections = sorted(detections, key=lambda d: d.get('frame', 0))
     
+    clusterer = SpatialClusterer()
     clusters = {}
-    cluster_id = 0
     
     for detection in detections:
-        pos = detection['position']
-        radius = detection.get('radius', 3)
-        
-        # Cluster distance is 3.5x the radius of this detection
-        cluster_dist = radius * CLUSTER_RADIUS_MULTIPLIER
-        
-        found_cluster = False
+        cid = clusterer.add(detection['position'], detection.get('radius', 3))
+        clusters.setdefault(cid, []).append(detection)
+    
+    return clusters
+
+
+class OnlineClusterer:
+    """
+    Streaming version of cluster_positions
+    Detections are fed frame by frame (in frame order) and only per-cluster
+    aggregates are kept, so memory does not grow with session length
+    """
+    
+    def __init__(self):
+        self.index = SpatialClusterer()
+        self.first_seen = []
+        self.last_seen = []
+        self.radius_sum = []
+        self.radius_min = []
+        self.radius_max = []
+        self.total_detections = 0
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def add(self, frame_idx: int, detections: List[Dict]) -> List[int]:
+        """Add one frame's detections, return the cluster id of each"""
+        cids = []
         
-        for cid, cluster_detections in clusters.items():
-            cluster_positions = [d['position'] for d in cluster_detections]
-            avg_x = np.mean([p[0] for p in cluster_positions])
-            avg_y = np.mean([p[1] for p in cluster_positions])
+        for detection in detections:
+            radius = detection.get('radius', 3)
+            cid = self.index.add(detection['position'], radius)
             
-            distance = np.sqrt((pos[0] - avg_x)**2 + (pos[1] - avg_y)**2)
+            if cid == len(self.first_seen):
+                self.first_seen.append(frame_idx)
+                self.last_seen.append(frame_idx)
+                self.radius_sum.append(radius)
+                self.radius_min.append(radius)
+                self.radius_max.append(radius)
+            else:
+                self.first_seen[cid] = min(self.first_seen[cid], frame_idx)
+                self.last_seen[cid] = max(self.last_seen[cid], frame_idx)
+                self.radius_sum[cid] += radius
+                self.radius_min[cid] = min(self.radius_min[cid], radius)
+                self.radius_max[cid] = max(self.radius_max[cid], radius)
             
-            # Use the cluster distance from this detection
-            if distance <= cluster_dist:
-                clusters[cid].append(detection)
-                found_cluster = True
-                break
+            cids.append(cid)
         
-        if not found_cluster:
-            clusters[cluster_id] = [detection]
-            cluster_id += 1
+        self.total_detections += len(detections)
+        return cids
     
-    return clusters
+    def snapshot(self) -> Dict[int, Dict]:
+        """Current state of every cluster"""
+        clusters = {}
+        
+        for cid, count in enumerate(self.index.counts):
+            clusters[cid] = {
+                'position': self.index.centroid(cid),
+                'count': count,
+                'first_frame': self.first_seen[cid],
+                'last_frame': self.last_seen[cid],
+                'radius_mean': self.radius_sum[cid] / count,
+                'radius_min': self.radius_min[cid],
+                'radius_max': self.radius_max[cid]
+            }
+        
+        return clusters
+
+
+class IncrementalDetector:
+    """
+    Creep + objective detection driven by frame differences
+    Each frame is diffed on a DIFF_TILE_SIZE grid against the pixels every
+    tile was last detected on (not just the previous frame, so slow changes
+    add up). Only dirty tiles (grown by one tile so blobs straddling them
+    are seen whole) are re-detected; cached detections elsewhere are kept.
+    A full pass runs on the first frame, on a size change, every
+    DIFF_FULL_PASS_INTERVAL frames and when more than
+    DIFF_FULL_PASS_FRACTION of the tiles changed
+    """
+    
+    def __init__(self, tile_size: int = DIFF_TILE_SIZE, threshold: int = DIFF_THRESHOLD,
+                 min_pixels: int = DIFF_MIN_PIXELS, full_pass_fraction: float = DIFF_FULL_PASS_FRACTION,
+                 full_pass_interval: int = DIFF_FULL_PASS_INTERVAL):
+        self.tile_size = tile_size
+        self.threshold = threshold
+        self.min_pixels = min_pixels
+        self.full_pass_fraction = full_pass_fraction
+        self.full_pass_interval = full_pass_interval
+        self.previous = None  # per tile, the pixels its cached detections came from
+        self.frames_since_full = 0
+        self.creeps = []
+        self.objectives = []
+        self.frames = 0
+        self.full_passes = 0
+        self.tiles_redetected = 0
+    
+    def reset(self):
+        self.previous = None
+        self.frames_since_full = 0
+        self.creeps = []
+        self.objectives = []
+    
+    def dirty_tiles(self, minimap_img: np.ndarray) -> np.ndarray:
+        """Boolean tile grid of where the frame changed since each tile was last detected"""
+        height, width = minimap_img.shape[:2]
+        tile = self.tile_size
+        rows, cols = -(-height // tile), -(-width // tile)
+        
+        # Changed = any channel moved by more than the threshold
+        diff = cv2.absdiff(minimap_img, self.previous)
+        unchanged = cv2.inRange(diff, (0, 0, 0), (self.threshold,) * 3)
+        
+        # Changed pixels per tile from the integral image at the tile corners
+        integral = cv2.integral(cv2.bitwise_not(unchanged))
+        ys = np.minimum(np.arange(rows + 1) * tile, height)
+        xs = np.minimum(np.arange(cols + 1) * tile, width)
+        corners = integral[ys[:, None], xs[None, :]]
+        counts = (corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]) // 255
+        
+        return counts >= self.min_pixels
+    
+    def _tile_box(self, x, y, w, h, width, height):
+        tile = self.tile_size
+        return x * tile, y * tile, min((x + w) * tile, width), min((y + h) * tile, height)
+    
+    def detect(self, minimap_img: np.ndarray, context=None) -> Tuple[List[Dict], List[Dict]]:
+        """Creeps and objectives for this frame, re-detecting only what changed"""
+        height, width = minimap_img.shape[:2]
+        self.frames += 1
+        
+        self.frames_since_full += 1
+        full_pass = (self.previous is None or self.previous.shape != minimap_img.shape
+                     or self.frames_since_full >= self.full_pass_interval)
+        if not full_pass:
+            with stage('incremental.diff'):
+                dirty = self.dirty_tiles(minimap_img)
+            full_pass = np.count_nonzero(dirty) > self.full_pass_fraction * dirty.size
+        
+        if full_pass:
+            self.full_passes += 1
+            self.tiles_redetected += -(-height // self.tile_size) * -(-width // self.tile_size)
+            self.creeps = detect_creeps(minimap_img, context=context)
+            self.objectives = detect_objectives(minimap_img, context=context)
+            self.previous = minimap_img.copy()
+            self.frames_since_full = 0
+            return self.creeps, self.objectives
+        
+        if not dirty.any():
+            incr('incremental.dirty_tiles', 0)
+            return self.creeps, self.objectives
+        
+        # Detections centred in a dirty tile are replaced; the detection
+        # region is one tile wider so their blobs are never cut off
+        kernel = np.ones((3, 3), np.uint8)
+        dirty = cv2.dilate(dirty.astype(np.uint8), kernel)
+        region = cv2.dilate(dirty, kernel)
+        self.tiles_redetected += int(np.count_nonzero(region))
+        incr('incremental.dirty_tiles', int(np.count_nonzero(dirty)))
+        
+        def is_dirty(det):
+            x, y = det['position']
+            return dirty[y // self.tile_size, x // self.tile_size] != 0
+        
+        # Only the dirty tiles get fresh detections, so only they move their reference
+        pixels = cv2.resize(dirty, None, fx=self.tile_size, fy=self.tile_size,
+                            interpolation=cv2.INTER_NEAREST)[:height, :width]
+        cv2.copyTo(minimap_img, pixels, self.previous)
+        
+        creeps = [c for c in self.creeps if not is_dirty(c)]
+        objectives = [o for o in self.objectives if not is_dirty(o)]
+        
+        # One detection pass per connected region; a detection belongs to
+        # the region its tile is labelled with, so overlapping boxes don't double up
+        n, labels, tile_stats, _ = cv2.connectedComponentsWithStats(region, connectivity=8)
+        
+        def owned(det, label):
+            x, y = det['position']
+            return labels[y // self.tile_size, x // self.tile_size] == label and is_dirty(det)
+        
+        for label in range(1, n):
+            x, y, w, h, _ = tile_stats[label]
+            roi = self._tile_box(x, y, w, h, width, height)
+            creeps.extend(c for c in detect_creeps(minimap_img, context=context, roi=roi)
+                          if owned(c, label))
+            objectives.extend(o for o in detect_objectives(minimap_img, context=context, roi=roi)
+                              if owned(o, label))
+        
+        self.creeps, self.objectives = creeps, objectives
+        return creeps, objectives
 
 
 if __name__ == "__main__":
@@ -242,20 +740,9 @@ if __name__ == "__main__":
     print(f"\n🟢 Found {len(creeps)} creeps (inside oval only)")
     print(f"🟡 Found {len(objectives)} objectives")
     
-    # Visualize
-    debug_img = img.copy()
-    
-    # Draw mask boundary for reference
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    cv2.drawContours(debug_img, contours, -1, (255, 0, 0), 1)
-    
-    for creep in creeps:
-        pos = creep['position']
-        cv2.circle(debug_img, pos, 2, (0, 255, 0), -1)  # Green dot
-    
-    for obj in objectives:
-        pos = obj['position']
-        cv2.circle(debug_img, pos, 10, (0, 255, 255), 2)  # Yellow circle
+    # Visualize (mask boundary, green creep dots, yellow objective circles)
+    from visualize import annotate
+    debug_img = annotate(img, creeps=creeps, objectives=objectives, mask=mask)
     
     output_dir = Path('outputs')
     output_dir.mkdir(exist_ok=True)
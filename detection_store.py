@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Columnar detection store
+- Structured NumPy record dtypes for markers, creeps and objectives
+- Sessions are written as one raw column file per table, appended in
+  chunks, plus index.json (dtype, row count, per-chunk frame ranges)
+- Loading memory-maps the tables; frame-range and team queries are
+  zero-copy slices
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MARKER_DTYPE = np.dtype([
+    ('frame', '<i4'), ('x', '<i2'), ('y', '<i2'), ('radius', 'u1'),
+    ('confidence', '<i2'), ('white_pixels', '<i2')
+])
+
+CREEP_DTYPE = np.dtype([
+    ('frame', '<i4'), ('x', '<i2'), ('y', '<i2'), ('radius', 'u1'), ('medium', '?')
+])
+
+OBJECTIVE_DTYPE = np.dtype([
+    ('frame', '<i4'), ('x', '<i2'), ('y', '<i2'), ('area', '<f4'),
+    ('bx', '<i2'), ('by', '<i2'), ('bw', '<i2'), ('bh', '<i2')
+])
+
+# Markers as the detectors return them (team kept until they are split into tables)
+MARKER_RECORD_DTYPE = np.dtype([('team', 'U6')] + MARKER_DTYPE.descr)
+
+# Markers are split by team so a team query is a table, not a mask
+TABLES = {
+    'markers_orange': MARKER_DTYPE,
+    'markers_purple': MARKER_DTYPE,
+    'creeps': CREEP_DTYPE,
+    'objectives': OBJECTIVE_DTYPE
+}
+
+INDEX_FILE = 'index.json'
+FORMAT_VERSION = 1
+
+
+def markers_to_records(markers: List[Dict], frame_idx: int = 0) -> np.ndarray:
+    records = np.zeros(len(markers), dtype=MARKER_RECORD_DTYPE)
+    for i, m in enumerate(markers):
+        records[i] = (m['team'], frame_idx, m['position'][0], m['position'][1],
+                      m['radius'], m['confidence'], m['white_pixels'])
+    return records
+
+
+def creeps_to_records(creeps: List[Dict], frame_idx: int = 0) -> np.ndarray:
+    records = np.zeros(len(creeps), dtype=CREEP_DTYPE)
+    for i, c in enumerate(creeps):
+        records[i] = (frame_idx, c['position'][0], c['position'][1],
+                      c.get('radius', 3), c.get('size') == 'medium')
+    return records
+
+
+def objectives_to_records(objectives: List[Dict], frame_idx: int = 0) -> np.ndarray:
+    records = np.zeros(len(objectives), dtype=OBJECTIVE_DTYPE)
+    for i, o in enumerate(objectives):
+        records[i] = (frame_idx, o['position'][0], o['position'][1], o['area'], *o['bbox'])
+    return records
+
+
+class DetectionWriter:
+    """
+    Append per-frame detections and flush them to disk every chunk_frames
+    Frames should arrive in increasing order; if they do not (e.g. several
+    live workers) the index says so and the reader sorts on load
+    """
+    
+    def __init__(self, path, chunk_frames: int = 256, metadata: Optional[Dict] = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_frames = chunk_frames
+        self.metadata = metadata or {}
+        
+        self.rows = {name: 0 for name in TABLES}
+        self.chunks = []
+        self.frames = 0
+        self._pending = {name: [] for name in TABLES}
+        self._chunk_start = None
+        self._last_frame = None
+        self._max_frame = None
+        self.ordered = True
+        self._files = {name: open(self.path / f'{name}.bin', 'wb') for name in TABLES}
+    
+    def append(self, frame_idx: int, markers=(), creeps=(), objectives=()):
+        """Add one frame of detector output (lists of dicts, or record arrays as-is)"""
+        if self._max_frame is not None and frame_idx < self._max_frame:
+            self.ordered = False
+        self._max_frame = frame_idx if self._max_frame is None else max(self._max_frame, frame_idx)
+        
+        if self._chunk_start is None:
+            self._chunk_start = frame_idx
+        self._last_frame = frame_idx
+        
+        marker_records = markers if isinstance(markers, np.ndarray) else markers_to_records(markers, frame_idx)
+        for team in ('orange', 'purple'):
+            rows = marker_records[marker_records['team'] == team]
+            self._pending[f'markers_{team}'].append(rows[list(MARKER_DTYPE.names)].astype(MARKER_DTYPE))
+        self._pending['creeps'].append(
+            creeps if isinstance(creeps, np.ndarray) else creeps_to_records(creeps, frame_idx))
+        self._pending['objectives'].append(
+            objectives if isinstance(objectives, np.ndarray) else objectives_to_records(objectives, frame_idx))
+        
+        self.frames += 1
+        if self.frames % self.chunk_frames == 0:
+            self.flush()
+    
+    def flush(self):
+        if self._chunk_start is None:
+            return
+        
+        chunk = {'first_frame': self._chunk_start, 'last_frame': self._last_frame, 'rows': {}}
+        for name, parts in self._pending.items():
+            data = np.concatenate(parts) if parts else np.zeros(0, dtype=TABLES[name])
+            self._files[name].write(data.tobytes())
+            chunk['rows'][name] = [self.rows[name], self.rows[name] + len(data)]
+            self.rows[name] += len(data)
+            parts.clear()
+        
+        self.chunks.append(chunk)
+        self._chunk_start = None
+    
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        
+        index = {
+            'version': FORMAT_VERSION,
+            'frames': self.frames,
+            'ordered': self.ordered,
+            'tables': {name: {'dtype': TABLES[name].descr, 'rows': self.rows[name]} for name in TABLES},
+            'chunks': self.chunks,
+            'metadata': self.metadata
+        }
+        with open(self.path / INDEX_FILE, 'w') as f:
+            json.dump(index, f, indent=2)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DetectionStore:
+    """Read-only, memory-mapped view of a written session"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / INDEX_FILE) as f:
+            self.index = json.load(f)
+        
+        self.metadata = self.index.get('metadata', {})
+        self.tables = {}
+        for name, info in self.index['tables'].items():
+            dtype = np.dtype([tuple(field) for field in info['dtype']])
+            if info['rows'] == 0:
+                self.tables[name] = np.zeros(0, dtype=dtype)
+            else:
+                self.tables[name] = np.memmap(self.path / f'{name}.bin', dtype=dtype,
+                                              mode='r', shape=(info['rows'],))
+            
+            # Out-of-order sessions are sorted once in memory
+            if not self.index.get('ordered', True):
+                data = self.tables[name]
+                self.tables[name] = data[np.argsort(data['frame'], kind='stable')]
+    
+    def table(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Rows with start <= frame < end (a view; tables are sorted by frame)"""
+        data = self.tables[name]
+        frames = data['frame']
+        lo = 0 if start is None else np.searchsorted(frames, start, side='left')
+        hi = len(data) if end is None else np.searchsorted(frames, end, side='left')
+        return data[lo:hi]
+    
+    def markers(self, team: str, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        return self.table(f'markers_{team}', start, end)
+    
+    def creeps(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        return self.table('creeps', start, end)
+    
+    def objectives(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        return self.table('objectives', start, end)
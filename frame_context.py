@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Shared per-frame analysis
+- HSV, grayscale and white mask computed once per minimap frame
+- Colour classes from one lookup-table pass (pixel_labels) instead of
+  HSV conversion + per-detector thresholds
+- Oval mask cached by frame size
+- analyze_frame() runs the Pokemon, creep and objective detectors on it
+- Optional incremental creep/objective detection (IncrementalDetector)
+- Optional marker tracking with windowed re-detection (MarkerTracker)
+- analyze_batch() runs them over a stack of same-size crops in one pass
+- Optional reference-scale mode: crops are resized once to CANONICAL_SIZE
+  and detections come back in reference-map coordinates
+"""
+
+import cv2
+import numpy as np
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+from pokemon_detector import detect_pokemon_markers, detect_pokemon_markers_batch, get_white_mask, ENGINE_HOUGH
+from creep_objective_detector_final_v2 import (detect_creeps, detect_objectives, get_minimap_mask,
+                                               detect_creeps_batch, detect_objectives_batch,
+                                               IncrementalDetector)
+from marker_tracker import MarkerTracker
+from detection_store import markers_to_records, creeps_to_records, objectives_to_records
+from pixel_labels import label_image, class_mask, LABEL_WHITE
+import instrumentation
+
+# Classify pixels through the BGR lookup table (exact, built once per process)
+USE_LABEL_TABLE = True
+
+# Minimap crops are square; the detector constants (Hough radii, blob and
+# contour areas) are tuned for crops of about this size
+CANONICAL_SIZE = 320
+
+
+class FrameContext:
+    """
+    Conversions shared by every detector for one minimap frame
+    Each one is computed on first use and reused afterwards
+    With use_labels the colour classes come from the label image and the
+    detectors never need the HSV frame
+    """
+    
+    def __init__(self, minimap_img: np.ndarray, use_labels: bool = USE_LABEL_TABLE):
+        self.image = minimap_img
+        self.height, self.width = minimap_img.shape[:2]
+        self.use_labels = use_labels
+        self._class_masks = {}
+    
+    @cached_property
+    def hsv(self) -> np.ndarray:
+        return cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
+    
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+    
+    @cached_property
+    def labels(self) -> np.ndarray:
+        return label_image(self.image)
+    
+    def class_mask(self, bit: int) -> np.ndarray:
+        """0/255 mask of one pixel class from the label image"""
+        if bit not in self._class_masks:
+            self._class_masks[bit] = class_mask(self.labels, bit)
+        return self._class_masks[bit]
+    
+    @cached_property
+    def white_mask(self) -> np.ndarray:
+        if self.use_labels:
+            return self.class_mask(LABEL_WHITE)
+        return get_white_mask(self.hsv)
+    
+    @cached_property
+    def minimap_mask(self) -> np.ndarray:
+        return get_minimap_mask(self.image)
+
+
+def to_canonical(minimap_img: np.ndarray) -> np.ndarray:
+    """Resize a minimap crop to CANONICAL_SIZE x CANONICAL_SIZE"""
+    height, width = minimap_img.shape[:2]
+    if (height, width) == (CANONICAL_SIZE, CANONICAL_SIZE):
+        return minimap_img
+    
+    shrinking = height * width > CANONICAL_SIZE * CANONICAL_SIZE
+    return cv2.resize(minimap_img, (CANONICAL_SIZE, CANONICAL_SIZE),
+                      interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR)
+
+
+def project_detections(markers: List[Dict], creeps: List[Dict], objectives: List[Dict],
+                       scale_x: float, scale_y: float) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Scale detection dicts into another coordinate space
+    Positions and boxes scale per axis, radii by the mean scale, areas by both
+    """
+    scale_r = (scale_x + scale_y) / 2
+    
+    def point(pos):
+        return int(pos[0] * scale_x), int(pos[1] * scale_y)
+    
+    markers = [dict(m, position=point(m['position']), radius=int(round(m['radius'] * scale_r)))
+               for m in markers]
+    creeps = [dict(c, position=point(c['position']), radius=max(int(round(c['radius'] * scale_r)), 2))
+              for c in creeps]
+    objectives = [dict(o, position=point(o['position']), area=o['area'] * scale_x * scale_y,
+                       bbox=(int(o['bbox'][0] * scale_x), int(o['bbox'][1] * scale_y),
+                             int(round(o['bbox'][2] * scale_x)), int(round(o['bbox'][3] * scale_y))))
+                  for o in objectives]
+    
+    return markers, creeps, objectives
+
+
+def analyze_frame(minimap_img: np.ndarray, frame_idx: int = 0, as_records: bool = False,
+                  marker_engine: str = ENGINE_HOUGH,
+                  reference_size: Optional[Tuple[int, int]] = None,
+                  incremental: Optional[IncrementalDetector] = None,
+                  marker_tracker: Optional[MarkerTracker] = None) -> Dict:
+    """
+    Run all detectors on one minimap frame off a single FrameContext
+    Returns {'markers', 'creeps', 'objectives', 'context', 'frame_size'}
+    With as_records the detections are structured arrays (detection_store dtypes)
+    marker_engine selects the Pokemon candidate engine ('hough' or 'components')
+    With reference_size (height, width) the crop is detected at CANONICAL_SIZE
+    and coordinates are returned in reference space; frame_size is the
+    (height, width) the coordinates refer to either way
+    With an IncrementalDetector creeps/objectives are only re-detected where
+    the frame changed; with a MarkerTracker markers are searched around their
+    predicted positions and carry a 'track_id'. Both need frames in order,
+    one stream per instance
+    Plain as_records frames get their arrays straight from the detectors;
+    tracking, incremental detection and projection work on dicts, so those
+    are converted at the end
+    """
+    if reference_size is not None:
+        minimap_img = to_canonical(minimap_img)
+    context = FrameContext(minimap_img)
+    
+    if as_records and reference_size is None and incremental is None and marker_tracker is None:
+        with instrumentation.frame(frame_idx):
+            markers = detect_pokemon_markers(minimap_img, context=context, engine=marker_engine,
+                                             as_records=True, frame_idx=frame_idx)
+            creeps = detect_creeps(minimap_img, context=context, as_records=True, frame_idx=frame_idx)
+            objectives = detect_objectives(minimap_img, context=context, as_records=True, frame_idx=frame_idx)
+        return {
+            'markers': markers,
+            'creeps': creeps,
+            'objectives': objectives,
+            'context': context,
+            'frame_size': minimap_img.shape[:2]
+        }
+    
+    with instrumentation.frame(frame_idx):
+        if marker_tracker is not None:
+            markers = marker_tracker.update(frame_idx, minimap_img, context=context)
+        else:
+            markers = detect_pokemon_markers(minimap_img, context=context, engine=marker_engine)
+        if incremental is not None:
+            creeps, objectives = incremental.detect(minimap_img, context=context)
+        else:
+            creeps = detect_creeps(minimap_img, context=context)
+            objectives = detect_objectives(minimap_img, context=context)
+    
+    if reference_size is not None:
+        ref_h, ref_w = reference_size
+        markers, creeps, objectives = project_detections(markers, creeps, objectives,
+                                                         ref_w / CANONICAL_SIZE, ref_h / CANONICAL_SIZE)
+        frame_size = (ref_h, ref_w)
+    else:
+        frame_size = minimap_img.shape[:2]
+    
+    if as_records:
+        markers = markers_to_records(markers, frame_idx)
+        creeps = creeps_to_records(creeps, frame_idx)
+        objectives = objectives_to_records(objectives, frame_idx)
+    
+    return {
+        'markers': markers,
+        'creeps': creeps,
+        'objectives': objectives,
+        'context': context,
+        'frame_size': frame_size
+    }
+
+
+def stack_frames(frames: List[np.ndarray]) -> np.ndarray:
+    """(N, H, W, 3) uint8 stack of same-size BGR crops"""
+    shapes = {f.shape for f in frames}
+    if len(shapes) > 1:
+        raise ValueError(f"Cannot stack frames of different sizes: {sorted(shapes)}")
+    return np.ascontiguousarray(np.stack(frames), dtype=np.uint8)
+
+
+def analyze_batch(frames, frame_indices: Optional[List[int]] = None, as_records: bool = False,
+                  marker_engine: str = ENGINE_HOUGH,
+                  reference_size: Optional[Tuple[int, int]] = None) -> List[Dict]:
+    """
+    analyze_frame over many same-size crops at once
+    frames is an (N, H, W, 3) array or a list of crops; one label-image (or
+    HSV) pass and one threshold/morphology pass per detector cover the whole stack.
+    Returns one {'markers', 'creeps', 'objectives', 'frame_size'} dict per frame
+    """
+    if reference_size is not None:
+        frames = [to_canonical(f) for f in frames]
+    if not isinstance(frames, np.ndarray):
+        frames = stack_frames(frames)
+    if len(frames) == 0:
+        return []
+    
+    count, height, width = frames.shape[:3]
+    if frame_indices is None:
+        frame_indices = list(range(count))
+    
+    hsv = labels = None
+    with instrumentation.stage('batch.convert'):
+        if USE_LABEL_TABLE:
+            labels = label_image(frames)
+        else:
+            hsv = cv2.cvtColor(frames.reshape(count * height, width, 3), cv2.COLOR_BGR2HSV).reshape(frames.shape)
+    
+    # Without projection the detectors emit the record arrays themselves
+    direct = frame_indices if as_records and reference_size is None else None
+    markers = detect_pokemon_markers_batch(frames, hsv=hsv, engine=marker_engine, labels=labels,
+                                           frame_indices=direct)
+    creeps = detect_creeps_batch(frames, hsv=hsv, labels=labels, frame_indices=direct)
+    objectives = detect_objectives_batch(frames, hsv=hsv, labels=labels, frame_indices=direct)
+    
+    results = []
+    for i, frame_idx in enumerate(frame_indices):
+        frame_markers, frame_creeps, frame_objectives = markers[i], creeps[i], objectives[i]
+        
+        if reference_size is not None:
+            ref_h, ref_w = reference_size
+            frame_markers, frame_creeps, frame_objectives = project_detections(
+                frame_markers, frame_creeps, frame_objectives, ref_w / CANONICAL_SIZE, ref_h / CANONICAL_SIZE)
+            frame_size = (ref_h, ref_w)
+        else:
+            frame_size = (height, width)
+        
+        if as_records and direct is None:
+            frame_markers = markers_to_records(frame_markers, frame_idx)
+            frame_creeps = creeps_to_records(frame_creeps, frame_idx)
+            frame_objectives = objectives_to_records(frame_objectives, frame_idx)
+        
+        results.append({
+            'markers': frame_markers,
+            'creeps': frame_creeps,
+            'objectives': frame_objectives,
+            'frame_size': frame_size
+        })
+    
+    return results
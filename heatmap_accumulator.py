@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Dense heatmap accumulator in reference-map coordinates
+- Positions are projected from the capture size to theiaskyruins.png size
+- One bincount per channel per frame (orange, purple, creep, objective)
+- Optional exponential time decay for "recent activity" maps
+- Memory is a few fixed-size arrays regardless of session length
+- HeatmapCube: cumulative per-time-bin histograms, so the heatmap of any
+  time window is one subtraction of two slices
+"""
+
+import numpy as np
+from typing import Dict, Iterable, Optional, Tuple
+
+CHANNELS = ('orange', 'purple', 'creep', 'objective')
+
+CUBE_BIN_FRAMES = 10  # frames per time bin of a HeatmapCube
+CUBE_CELL = 4  # reference-map pixels per cube cell (each side)
+
+# Rescale lazily-decayed counts before the growing weight overflows
+_MAX_WEIGHT = 1e100
+
+
+class HeatmapAccumulator:
+    """
+    Per-channel 2D histograms at reference-map resolution
+    With half_life (in frames) older frames fade out; decay is applied
+    lazily by weighting new frames more, so a frame costs O(points)
+    """
+    
+    def __init__(self, reference_size: Tuple[int, int], capture_size: Tuple[int, int],
+                 half_life: Optional[float] = None):
+        self.height, self.width = reference_size
+        capture_h, capture_w = capture_size
+        self.scale_x = self.width / capture_w
+        self.scale_y = self.height / capture_h
+        
+        self.decay = 0.5 ** (1.0 / half_life) if half_life else None
+        self.counts = np.zeros((len(CHANNELS), self.height, self.width), dtype=np.float64)
+        self.frames = 0
+        self._weight = 1.0
+    
+    def project(self, positions: Iterable) -> np.ndarray:
+        """Flat reference-map indices of capture-space (x, y) positions (off-map dropped)"""
+        pts = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        xs = (pts[:, 0] * self.scale_x).astype(np.int64)
+        ys = (pts[:, 1] * self.scale_y).astype(np.int64)
+        keep = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        return ys[keep] * self.width + xs[keep]
+    
+    def add(self, channel: str, positions: Iterable):
+        """Add capture-space positions to one channel"""
+        idx = self.project(positions)
+        if len(idx) == 0:
+            return
+        
+        hist = np.bincount(idx, minlength=self.height * self.width)
+        self.counts[CHANNELS.index(channel)].reshape(-1)[:] += hist * self._weight
+    
+    def next_frame(self):
+        """Advance time by one frame (only matters with decay)"""
+        self.frames += 1
+        if self.decay is None:
+            return
+        
+        self._weight /= self.decay
+        if self._weight > _MAX_WEIGHT:
+            self.counts /= self._weight
+            self._weight = 1.0
+    
+    def add_frame(self, markers=(), creeps=(), objectives=()):
+        """Add one frame of detector output and advance time"""
+        self.add('orange', [m['position'] for m in markers if m['team'] == 'orange'])
+        self.add('purple', [m['position'] for m in markers if m['team'] != 'orange'])
+        self.add('creep', [c['position'] for c in creeps])
+        self.add('objective', [o['position'] for o in objectives])
+        self.next_frame()
+    
+    def channel(self, name: str) -> np.ndarray:
+        """Current (decayed) histogram of one channel as float32"""
+        hist = self.counts[CHANNELS.index(name)]
+        if self._weight != 1.0:
+            hist = hist / self._weight
+        return hist.astype(np.float32)
+    
+    def heatmaps(self) -> Dict[str, np.ndarray]:
+        return {name: self.channel(name) for name in CHANNELS}
+    
+    def reset(self):
+        self.counts[:] = 0
+        self.frames = 0
+        self._weight = 1.0
+
+
+class HeatmapCube:
+    """
+    Cumulative time-binned histograms in reference-map coordinates
+    slices[k] holds every detection of bins < k, so the heatmap of bins
+    [a, b) is slices[b] - slices[a]: O(H x W) whatever the session length
+    Cells are CUBE_CELL reference pixels square to keep a long match small
+    (600 frames, 10 frame bins, 4px cells: ~14 MB)
+    """
+    
+    def __init__(self, reference_size: Tuple[int, int], capture_size: Tuple[int, int],
+                 bin_frames: int = CUBE_BIN_FRAMES, cell: int = CUBE_CELL):
+        self.reference_size = tuple(reference_size)
+        self.bin_frames = bin_frames
+        self.cell = cell
+        grid = (-(-self.reference_size[0] // cell), -(-self.reference_size[1] // cell))
+        
+        # The open bin is a plain accumulator at cube resolution
+        self.current = HeatmapAccumulator(grid, capture_size)
+        self.slices = [np.zeros((len(CHANNELS),) + grid, dtype=np.uint32)]
+    
+    @property
+    def num_bins(self) -> int:
+        """Closed bins plus the open one"""
+        return len(self.slices)
+    
+    def _close_bins(self, upto: int):
+        """Close the open bin and any empty ones until bin `upto` is open"""
+        while len(self.slices) <= upto:
+            self.slices.append(self.slices[-1] + self.current.counts.astype(np.uint32))
+            self.current.reset()
+    
+    def add_frame(self, frame_idx: int, markers=(), creeps=(), objectives=()):
+        """
+        Add one frame of detector output (capture-space positions)
+        A frame older than the open bin is counted in the open bin
+        """
+        self._close_bins(frame_idx // self.bin_frames)
+        self.current.add_frame(markers, creeps, objectives)
+    
+    def cumulative(self) -> np.ndarray:
+        """(num_bins + 1, channels, h, w) slices, the last one including the open bin"""
+        return np.stack(self.slices + [self.slices[-1] + self.current.counts.astype(np.uint32)])
+    
+    def _slice(self, k: int) -> np.ndarray:
+        if k < len(self.slices):
+            return self.slices[k]
+        return self.slices[-1] + self.current.counts.astype(np.uint32)
+    
+    def window(self, channel: str, start_frame: int = 0, end_frame: Optional[int] = None) -> np.ndarray:
+        """
+        Histogram of one channel over frames [start_frame, end_frame), widened
+        to whole bins, at cube resolution
+        """
+        first = max(start_frame // self.bin_frames, 0)
+        last = self.num_bins if end_frame is None else -(-end_frame // self.bin_frames)
+        last = min(max(last, first), self.num_bins)
+        
+        c = CHANNELS.index(channel)
+        return (self._slice(last)[c].astype(np.int64) - self._slice(first)[c]).astype(np.float32)
+    
+    def to_reference(self, hist: np.ndarray) -> np.ndarray:
+        """Spread a cube-resolution histogram over reference-map pixels"""
+        height, width = self.reference_size
+        full = np.repeat(np.repeat(hist, self.cell, axis=0), self.cell, axis=1)[:height, :width]
+        return (full / (self.cell * self.cell)).astype(np.float32)
+    
+    def coarsen(self, factor: int) -> 'HeatmapCube':
+        """A cube with factor-times longer bins (every factor-th slice; for long sessions)"""
+        cube = HeatmapCube.__new__(HeatmapCube)
+        cube.reference_size = self.reference_size
+        cube.bin_frames = self.bin_frames * factor
+        cube.cell = self.cell
+        cube.current = HeatmapAccumulator(self.current.counts.shape[1:], (1, 1))
+        
+        slices = list(self.cumulative())
+        cube.slices = slices[:-1:factor]
+        # The remainder of the last coarse bin stays open
+        cube.current.counts[:] = slices[-1] - cube.slices[-1]
+        return cube
+    
+    def save(self, path):
+        np.savez_compressed(path, cube=self.cumulative(), bin_frames=self.bin_frames, cell=self.cell,
+                            reference_size=np.array(self.reference_size), channels=np.array(CHANNELS))
+    
+    @classmethod
+    def load(cls, path) -> 'HeatmapCube':
+        """Cube saved with save(); windows work, adding frames does not"""
+        with np.load(path) as data:
+            cube = cls(tuple(data['reference_size']), tuple(data['reference_size']),
+                       bin_frames=int(data['bin_frames']), cell=int(data['cell']))
+            slices = list(data['cube'])
+        cube.slices = slices[:-1]
+        cube.current.counts[:] = slices[-1] - slices[-2]
+        return cube
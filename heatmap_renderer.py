@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Heatmap renderer over theiaskyruins.png
+- Histograms are splatted with a separable Gaussian (cv2.sepFilter2D), so
+  cost depends on the map size, not the number of points
+- Intensity -> alpha through a 256-entry LUT, one vectorized blend per layer
+- The float base map and every partial composite are cached; only layers
+  whose histogram changed (and the ones drawn above them) are re-blended
+- Creep/objective markers are drawn on top as annotations
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BLUR_KSIZE = 25  # Gaussian kernel size (px), sigma derived from it like cv2.GaussianBlur
+ALPHA_SCALE = 0.6  # alpha at full intensity
+ALPHA_MAX = 0.8  # alpha cap
+MIN_INTENSITY = 0.01  # intensity of the faintest non-zero pixel
+LUT_LEVELS = 256
+
+# BGR
+HEAT_LAYERS = (('orange', (0, 154, 255)), ('purple', (255, 76, 175)))
+DOT_COLOR = (0, 255, 255)
+
+
+def alpha_lut() -> np.ndarray:
+    """Alpha per quantized intensity level; level 0 is an empty pixel"""
+    levels = np.arange(LUT_LEVELS, dtype=np.float32) / (LUT_LEVELS - 1)
+    alpha = np.minimum((MIN_INTENSITY + levels * (1 - MIN_INTENSITY)) * ALPHA_SCALE, ALPHA_MAX)
+    alpha[0] = 0.0
+    return alpha.reshape(1, LUT_LEVELS)
+
+
+def format_uptime(seconds: int) -> str:
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class HeatmapRenderer:
+    """
+    Composite heat layers and annotations over a base map
+    set_layer() only marks a layer dirty when its histogram changed, so
+    calling it with the live accumulator every refresh is cheap
+    """
+    
+    def __init__(self, base_img: np.ndarray, layers: Iterable[Tuple[str, Tuple[int, int, int]]] = HEAT_LAYERS,
+                 ksize: int = BLUR_KSIZE):
+        self.base = base_img.astype(np.float32)
+        self.height, self.width = base_img.shape[:2]
+        self.kernel = cv2.getGaussianKernel(ksize, 0, cv2.CV_32F)
+        self.lut = alpha_lut()
+        
+        self.names = [name for name, _ in layers]
+        self.colors = {name: np.array(color, dtype=np.float32) for name, color in layers}
+        self.hists: Dict[str, Optional[np.ndarray]] = {name: None for name in self.names}
+        self.alphas: Dict[str, Optional[np.ndarray]] = {name: None for name in self.names}
+        self.annotations: Dict[str, List] = {}
+        
+        # composites[i] = base with layers [0, i) blended in
+        self.composites = [self.base] + [None] * len(self.names)
+        self.dirty_from = 0
+        self.layer_renders = 0
+    
+    def set_layer(self, name: str, hist: np.ndarray):
+        """Histogram (reference-map resolution) for one heat layer"""
+        if hist.shape != (self.height, self.width):
+            raise ValueError(f"Layer {name!r} is {hist.shape}, expected {(self.height, self.width)}")
+        
+        previous = self.hists[name]
+        if previous is not None and np.array_equal(previous, hist):
+            return
+        
+        self.hists[name] = hist.astype(np.float32, copy=True)
+        self.alphas[name] = None
+        self.dirty_from = min(self.dirty_from, self.names.index(name))
+    
+    def set_annotations(self, name: str, points: Iterable[Tuple[int, int, str]],
+                        text_color: Tuple[int, int, int]):
+        """Dots with a text label, (x, y, text) in reference coordinates; replaces earlier ones"""
+        self.annotations[name] = [(int(x), int(y), text, text_color) for x, y, text in points]
+    
+    def _alpha(self, name: str) -> Optional[np.ndarray]:
+        """Per-pixel alpha of one layer (None when empty)"""
+        if self.alphas[name] is None and self.hists[name] is not None:
+            blurred = cv2.sepFilter2D(self.hists[name], cv2.CV_32F, self.kernel, self.kernel)
+            peak = float(blurred.max())
+            if peak <= 0:
+                return None
+            
+            # ceil keeps every non-zero pixel off level 0 (empty)
+            levels = np.ceil(blurred * ((LUT_LEVELS - 1) / peak))
+            levels = np.clip(levels, 0, LUT_LEVELS - 1).astype(np.uint8)
+            self.alphas[name] = cv2.LUT(levels, self.lut)
+            self.layer_renders += 1
+        return self.alphas[name]
+    
+    def render_layers(self) -> np.ndarray:
+        """Float composite of all heat layers, re-blending from the first dirty one"""
+        for i in range(self.dirty_from, len(self.names)):
+            name = self.names[i]
+            below = self.composites[i]
+            alpha = self._alpha(name)
+            if alpha is None:
+                self.composites[i + 1] = below
+                continue
+            self.composites[i + 1] = below + (self.colors[name] - below) * alpha[..., None]
+        
+        self.dirty_from = len(self.names)
+        return self.composites[-1]
+    
+    def render(self) -> np.ndarray:
+        """BGR uint8 image: heat layers, then annotations"""
+        final = self.render_layers().astype(np.uint8)
+        
+        for points in self.annotations.values():
+            for x, y, text, text_color in points:
+                cv2.circle(final, (x, y), 3, DOT_COLOR, -1)
+                cv2.putText(final, text, (x + 8, y + 4),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, text_color, 1, cv2.LINE_AA)
+        
+        return final
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-stage timing and counters for the detectors
+- Disabled by default; stage()/incr() are a flag check when off
+- Aggregate stats per stage and counter across all frames
+- Optional per-frame trace (one record per analyzed frame)
+
+Usage:
+    import instrumentation
+    instrumentation.enable(trace=True)
+    ... run detectors ...
+    print(instrumentation.report())
+    instrumentation.dump_trace('trace.jsonl')
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+_enabled = False
+_tracing = False
+_lock = threading.Lock()
+_local = threading.local()
+_NULL = nullcontext()
+
+
+class StageStats:
+    """Aggregate wall time for one stage"""
+    
+    __slots__ = ('calls', 'total', 'min', 'max')
+    
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+    
+    def add(self, elapsed: float):
+        self.calls += 1
+        self.total += elapsed
+        self.min = min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+    
+    def as_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'total_ms': self.total * 1000.0,
+            'mean_ms': self.total / self.calls * 1000.0 if self.calls else 0.0,
+            'min_ms': self.min * 1000.0 if self.calls else 0.0,
+            'max_ms': self.max * 1000.0
+        }
+
+
+class Stats:
+    """Stage timings and counters aggregated over every frame"""
+    
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.frames = 0
+    
+    def as_dict(self) -> Dict:
+        return {
+            'frames': self.frames,
+            'stages': {name: s.as_dict() for name, s in sorted(self.stages.items())},
+            'counters': dict(sorted(self.counters.items()))
+        }
+
+
+_stats = Stats()
+_trace: List[Dict] = []
+
+
+def enable(trace: bool = False):
+    """Turn instrumentation on (trace=True also keeps one record per frame)"""
+    global _enabled, _tracing
+    _enabled = True
+    _tracing = trace
+
+
+def disable():
+    global _enabled, _tracing
+    _enabled = False
+    _tracing = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    global _stats
+    with _lock:
+        _stats = Stats()
+        _trace.clear()
+
+
+def _record_stage(name: str, elapsed: float):
+    with _lock:
+        stage_stats = _stats.stages.get(name)
+        if stage_stats is None:
+            stage_stats = _stats.stages[name] = StageStats()
+        stage_stats.add(elapsed)
+    
+    frame = getattr(_local, 'frame', None)
+    if frame is not None:
+        frame['stages'][name] = frame['stages'].get(name, 0.0) + elapsed * 1000.0
+
+
+@contextmanager
+def _timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_stage(name, time.perf_counter() - start)
+
+
+def stage(name: str):
+    """Context manager timing one detector stage"""
+    if not _enabled:
+        return _NULL
+    return _timed(name)
+
+
+def incr(name: str, amount: int = 1):
+    """Add to a counter"""
+    if not _enabled:
+        return
+    with _lock:
+        _stats.counters[name] = _stats.counters.get(name, 0) + int(amount)
+    
+    frame = getattr(_local, 'frame', None)
+    if frame is not None:
+        frame['counters'][name] = frame['counters'].get(name, 0) + int(amount)
+
+
+@contextmanager
+def _frame_scope(frame_idx):
+    record = {'frame': frame_idx, 'stages': {}, 'counters': {}} if _tracing else None
+    previous = getattr(_local, 'frame', None)
+    _local.frame = record
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.frame = previous
+        _record_stage('frame', elapsed)
+        with _lock:
+            _stats.frames += 1
+            if record is not None:
+                record['total_ms'] = elapsed * 1000.0
+                _trace.append(record)
+
+
+def frame(frame_idx: Optional[int] = None):
+    """Context manager grouping the stages of one frame"""
+    if not _enabled:
+        return _NULL
+    return _frame_scope(frame_idx)
+
+
+def stats() -> Dict:
+    """Aggregate stats as a plain dict"""
+    with _lock:
+        return _stats.as_dict()
+
+
+def trace() -> List[Dict]:
+    with _lock:
+        return list(_trace)
+
+
+def dump_trace(path):
+    """Write the per-frame trace as JSON lines"""
+    with open(path, 'w') as f:
+        for record in trace():
+            f.write(json.dumps(record) + '\n')
+
+
+def report() -> str:
+    """Human-readable summary of the aggregate stats"""
+    data = stats()
+    lines = [f"Frames: {data['frames']}"]
+    for name, s in data['stages'].items():
+        lines.append(f"   {name:28s} {s['calls']:7d} calls  mean {s['mean_ms']:8.3f}ms  "
+                     f"max {s['max_ms']:8.3f}ms  total {s['total_ms']:10.1f}ms")
+    for name, value in data['counters'].items():
+        lines.append(f"   {name:28s} {value:9d}")
+    return "\n".join(lines)
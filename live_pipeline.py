@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Live capture/detect pipeline
+- Capture thread -> bounded queue -> detector worker threads
+- Overload policy when the queue is full: drop oldest, drop newest or block
+- Counters for captured, processed, dropped and late frames
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class PipelineStats:
+    """Thread-safe pipeline counters"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.late = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_latency = 0.0
+    
+    def incr(self, name: str, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+    
+    def observe_queue(self, depth: int):
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+    
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'captured': self.captured,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'late': self.late,
+                'failed': self.failed,
+                'max_queue_depth': self.max_queue_depth,
+                'mean_latency': self.total_latency / self.processed if self.processed else 0.0
+            }
+
+
+class LivePipeline:
+    """
+    capture() -> frame or None, called at `fps` on the capture thread
+    process(frame, frame_idx) -> result, called on `workers` detector threads
+    (with one worker, frames reach process() in capture order)
+    on_result(frame_idx, frame, result) is called from the worker threads
+    A frame is counted late when its result lands more than max_latency
+    seconds after capture (default: two capture intervals)
+    """
+    
+    def __init__(self, capture: Callable, process: Callable, on_result: Optional[Callable] = None,
+                 fps: float = 1.0, queue_size: int = 4, workers: int = 1,
+                 policy: str = DROP_OLDEST, max_latency: Optional[float] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overload policy: {policy}")
+        
+        self.capture = capture
+        self.process = process
+        self.on_result = on_result
+        self.interval = 1.0 / fps
+        self.workers = workers
+        self.policy = policy
+        self.max_latency = max_latency if max_latency is not None else 2 * self.interval
+        
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = PipelineStats()
+        self._stop = threading.Event()
+        self._threads = []
+    
+    def _enqueue(self, item):
+        if self.policy == BLOCK:
+            while not self._stop.is_set():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if self.policy == DROP_NEWEST:
+                self.stats.incr('dropped')
+                return
+            
+            # DROP_OLDEST: make room by discarding the stalest frame
+            try:
+                self.queue.get_nowait()
+                self.stats.incr('dropped')
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.stats.incr('dropped')
+    
+    def _capture_loop(self, max_frames: Optional[int]):
+        frame_idx = 0
+        
+        while not self._stop.is_set() and (max_frames is None or frame_idx < max_frames):
+            frame_start = time.time()
+            
+            frame = self.capture()
+            if frame is not None:
+                self.stats.incr('captured')
+                self._enqueue((frame_idx, frame_start, frame))
+                self.stats.observe_queue(self.queue.qsize())
+                frame_idx += 1
+            
+            elapsed = time.time() - frame_start
+            if elapsed < self.interval:
+                self._stop.wait(self.interval - elapsed)
+    
+    def _worker_loop(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            try:
+                frame_idx, captured_at, frame = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            try:
+                result = self.process(frame, frame_idx)
+                if self.on_result is not None:
+                    self.on_result(frame_idx, frame, result)
+            except Exception as e:
+                self.stats.incr('failed')
+                print(f"⚠️  Frame {frame_idx} failed: {e}")
+                continue
+            finally:
+                self.queue.task_done()
+            
+            latency = time.time() - captured_at
+            self.stats.incr('processed')
+            self.stats.incr('total_latency', latency)
+            if latency > self.max_latency:
+                self.stats.incr('late')
+    
+    def start(self, max_frames: Optional[int] = None):
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._worker_loop, daemon=True)
+                         for _ in range(self.workers)]
+        self._capture_thread = threading.Thread(target=self._capture_loop, args=(max_frames,), daemon=True)
+        
+        for t in self._threads:
+            t.start()
+        self._capture_thread.start()
+    
+    def stop(self):
+        """Stop capturing; workers finish what is already queued"""
+        self._stop.set()
+        self._capture_thread.join()
+        for t in self._threads:
+            t.join()
+    
+    def run(self, duration: Optional[float] = None, max_frames: Optional[int] = None,
+            should_stop: Callable[[], bool] = lambda: False):
+        """Run until duration/max_frames is reached or should_stop() is true"""
+        self.start(max_frames=max_frames)
+        deadline = time.time() + duration if duration is not None else None
+        
+        try:
+            while self._capture_thread.is_alive() and not should_stop():
+                if deadline is not None and time.time() >= deadline:
+                    break
+                time.sleep(0.1)
+        finally:
+            self.stop()
+        
+        return self.stats.as_dict()
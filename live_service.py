@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Local live-state service for overlays and dashboards
+- asyncio HTTP + WebSocket server on loopback only (stdlib, no extra deps)
+- GET /state: JSON snapshot (latest markers, creep clusters, totals, pipeline stats)
+- GET /heatmap.png: current heatmap over theiaskyruins.png
+- GET /subscribe (WebSocket): a snapshot after every processed frame;
+  a slow client skips to the newest one instead of queueing
+- Detection stays on its own threads and only publishes into LiveState;
+  the event loop runs on a separate thread, so clients never stall capture
+
+Usage:
+    python tracker_production.py --live --serve
+    python live_service.py client --count 10
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+from heatmap_renderer import HeatmapRenderer, HEAT_LAYERS
+
+SERVICE_HOST = '127.0.0.1'  # loopback only
+SERVICE_PORT = 8765
+SUBSCRIBE_MAX_HZ = 10  # max snapshots per second per subscriber
+SEND_TIMEOUT = 5.0  # seconds a client may take to accept a write before it is dropped
+MAX_HEADER_BYTES = 16384
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+def _to_json(obj):
+    """json.dumps default for numpy scalars/arrays"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+class LiveState:
+    """
+    Latest tracker state: written by the detector threads through publish(),
+    read by the service. Encoded JSON and the rendered PNG are cached per version
+    """
+    
+    def __init__(self, reference_map: np.ndarray, layers=HEAT_LAYERS):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.reference_size = reference_map.shape[:2]
+        self.layer_names = [name for name, _ in layers]
+        self.listeners: List[Callable[[], None]] = []
+        
+        self._snapshot = {'version': 0, 'frame': None, 'markers': [], 'creep_clusters': [],
+                          'objectives': [], 'totals': {}, 'stats': {}}
+        self._hists: Dict[str, np.ndarray] = {}
+        self._json = (-1, b'')
+        self._png = (-1, b'')
+        self._renderer = HeatmapRenderer(reference_map, layers=layers)
+        self._render_lock = threading.Lock()
+    
+    def publish(self, frame_idx: int, result: Dict, session, stats: Optional[Dict] = None):
+        """Record a frame already folded into the session (call from the detector side)"""
+        markers = [{'position': [int(m['position'][0]), int(m['position'][1])], 'radius': int(m['radius']),
+                    'team': m['team'], **({'track_id': m['track_id']} if 'track_id' in m else {})}
+                   for m in result['markers']]
+        clusters = [{'id': cid, 'position': [int(c['position'][0]), int(c['position'][1])],
+                     'count': c['count'], 'uptime_seconds': session.seconds(c['count']),
+                     'first_frame': c['first_frame'], 'last_frame': c['last_frame']}
+                    for cid, c in session.creep_det.snapshot().items()]
+        
+        hists = {}
+        if session.heatmaps is not None:
+            hists = {name: session.heatmaps.channel(name) for name in self.layer_names}
+        
+        with self.lock:
+            self.version += 1
+            self._snapshot = {
+                'version': self.version,
+                'frame': frame_idx,
+                'time': time.time(),
+                'frame_size': list(result.get('frame_size', ())),
+                'reference_size': list(self.reference_size),
+                'markers': markers,
+                'creep_clusters': clusters,
+                'objectives': [{'position': [int(o['position'][0]), int(o['position'][1])]}
+                               for o in result['objectives']],
+                'totals': {'purple': len(session.purple_pos), 'orange': len(session.orange_pos),
+                           'creeps': session.creep_det.total_detections, 'objectives': len(session.obj_det)},
+                'stats': stats or {}
+            }
+            self._hists = hists
+        
+        for notify in self.listeners:
+            notify()
+    
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return self._snapshot
+    
+    def snapshot_json(self) -> Tuple[int, bytes]:
+        """(version, encoded snapshot)"""
+        with self.lock:
+            if self._json[0] != self.version:
+                self._json = (self.version, json.dumps(self._snapshot, default=_to_json).encode())
+            return self._json
+    
+    def heatmap_png(self) -> bytes:
+        """Current heatmap as PNG; only changed layers are re-rendered"""
+        with self._render_lock:
+            with self.lock:
+                version, hists = self.version, self._hists
+            if self._png[0] != version:
+                for name, hist in hists.items():
+                    self._renderer.set_layer(name, hist)
+                ok, png = cv2.imencode('.png', self._renderer.render())
+                self._png = (version, png.tobytes())
+            return self._png[1]
+
+
+def ws_accept(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def ws_frame(payload: bytes, opcode: int = OP_TEXT, mask: bool = False) -> bytes:
+    """One final WebSocket frame (clients must mask, servers must not)"""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack('!BB', 0x80 | opcode, n | (0x80 if mask else 0))
+    elif n < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126 | (0x80 if mask else 0), n)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127 | (0x80 if mask else 0), n)
+    
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    masked = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(key, np.uint8), n)).tobytes()
+    return header + key + masked
+
+
+async def read_ws_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """(opcode, payload) of the next frame; fragments are returned as they come"""
+    b1, b2 = await reader.readexactly(2)
+    n = b2 & 0x7F
+    if n == 126:
+        n = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack('!Q', await reader.readexactly(8))[0]
+    
+    key = await reader.readexactly(4) if b2 & 0x80 else None
+    payload = await reader.readexactly(n)
+    if key is not None:
+        payload = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(key, np.uint8), n)).tobytes()
+    return b1 & 0x0F, payload
+
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str]]:
+    """(method, path, lower-cased headers) of an HTTP/1.1 request"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    if len(head) > MAX_HEADER_BYTES:
+        raise ValueError("Request header too large")
+    
+    lines = head.decode('latin-1').split('\r\n')
+    method, path, _ = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, path, headers
+
+
+class LiveService:
+    """
+    HTTP/WebSocket server over a LiveState, on its own event-loop thread
+    start() returns once the socket is listening; stop() aborts every client,
+    including ones that stopped reading mid-write
+    A client that takes longer than send_timeout to accept a write is dropped
+    """
+    
+    def __init__(self, state: LiveState, host: str = SERVICE_HOST, port: int = SERVICE_PORT,
+                 max_hz: float = SUBSCRIBE_MAX_HZ, send_timeout: float = SEND_TIMEOUT):
+        self.state = state
+        self.host = host
+        self.port = port
+        self.min_interval = 1.0 / max_hz
+        self.send_timeout = send_timeout
+        
+        self.loop = None
+        self.server = None
+        self.subscribers = 0
+        self.requests = 0
+        self._changed = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopped = None
+        self._clients = {}
+    
+    # Event loop thread
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self.server is None:
+            raise RuntimeError(f"Could not listen on {self.host}:{self.port}")
+        return self
+    
+    def stop(self):
+        if self.loop is not None and self._stopped is not None:
+            self.loop.call_soon_threadsafe(self._stopped.set)
+            self._thread.join()
+    
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+    
+    async def _serve(self):
+        self._changed = asyncio.Event()
+        self._stopped = asyncio.Event()
+        try:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            print(f"❌ Live service: {e}")
+            self._ready.set()
+            return
+        
+        # Publishing threads only schedule a wake-up on the loop
+        notify = lambda: self.loop.call_soon_threadsafe(self._notify)
+        self.state.listeners.append(notify)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._ready.set()
+        
+        try:
+            await self._stopped.wait()
+        finally:
+            self.state.listeners.remove(notify)
+            self.server.close()
+            # Wake subscribers and drop connections so every handler returns;
+            # abort() also releases handlers blocked in drain()
+            self._notify()
+            for writer in self._clients.values():
+                writer.transport.abort()
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await self.server.wait_closed()
+    
+    def _notify(self):
+        event, self._changed = self._changed, asyncio.Event()
+        event.set()
+    
+    # Connections
+    
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients[task] = writer
+        try:
+            method, path, headers = await read_request(reader)
+            self.requests += 1
+            path = path.split('?', 1)[0]
+            
+            if method != 'GET':
+                await self._respond(writer, 405, b'GET only\n', 'text/plain')
+            elif path == '/subscribe':
+                if headers.get('upgrade', '').lower() == 'websocket' and 'sec-websocket-key' in headers:
+                    await self._subscribe(reader, writer, headers['sec-websocket-key'])
+                else:
+                    await self._respond(writer, 400, b'WebSocket upgrade required\n', 'text/plain')
+            elif path == '/state':
+                _, body = self.state.snapshot_json()
+                await self._respond(writer, 200, body, 'application/json')
+            elif path == '/heatmap.png':
+                body = await self.loop.run_in_executor(None, self.state.heatmap_png)
+                await self._respond(writer, 200, body, 'image/png')
+            elif path == '/':
+                body = json.dumps({'endpoints': ['/state', '/heatmap.png', '/subscribe'],
+                                   'version': self.state.version, 'subscribers': self.subscribers}).encode()
+                await self._respond(writer, 200, body, 'application/json')
+            else:
+                await self._respond(writer, 404, b'Not found\n', 'text/plain')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._clients.pop(task, None)
+            writer.close()
+    
+    async def _drain(self, writer):
+        """drain() that drops a client not reading within send_timeout"""
+        try:
+            await asyncio.wait_for(writer.drain(), self.send_timeout)
+        except asyncio.TimeoutError:
+            writer.transport.abort()
+            raise ConnectionAbortedError("Client stopped reading")
+    
+    async def _respond(self, writer, status: int, body: bytes, content_type: str):
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await self._drain(writer)
+    
+    async def _subscribe(self, reader, writer, key: str):
+        """Push the newest snapshot whenever the state changes, at most max_hz"""
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Accept: {ws_accept(key)}\r\n\r\n".encode())
+        await self._drain(writer)
+        self.subscribers += 1
+        
+        closed = asyncio.Event()
+        
+        async def read_loop():
+            try:
+                while True:
+                    opcode, payload = await read_ws_frame(reader)
+                    if opcode == OP_CLOSE:
+                        writer.write(ws_frame(payload[:2], OP_CLOSE))
+                        break
+                    if opcode == OP_PING:
+                        writer.write(ws_frame(payload, OP_PONG))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                closed.set()
+        
+        reader_task = asyncio.ensure_future(read_loop())
+        sent = -1
+        try:
+            while not closed.is_set() and not self._stopped.is_set():
+                changed = self._changed
+                if self.state.version != sent:
+                    sent, body = self.state.snapshot_json()
+                    writer.write(ws_frame(body))
+                    await self._drain(writer)
+                    await asyncio.sleep(self.min_interval)
+                    continue
+                
+                waiters = [asyncio.ensure_future(changed.wait()), asyncio.ensure_future(closed.wait())]
+                try:
+                    await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for w in waiters:
+                        w.cancel()
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers -= 1
+            reader_task.cancel()
+            await asyncio.gather(reader_task, return_exceptions=True)
+
+
+# Stub client
+
+async def fetch(host: str, port: int, path: str) -> Tuple[int, bytes]:
+    """(status, body) of a GET request"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    body = await reader.read()
+    writer.close()
+    return status, body
+
+
+async def subscribe(host: str, port: int, count: int, on_snapshot: Callable[[Dict], None]):
+    """Receive count snapshots from /subscribe, then close"""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(f"GET /subscribe HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                 f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+    await writer.drain()
+    
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line = head.split(b'\r\n', 1)[0]
+    if b' 101 ' not in status_line or ws_accept(key).encode() not in head:
+        raise ConnectionError(f"WebSocket handshake failed: {status_line!r}")
+    
+    received = 0
+    while received < count:
+        opcode, payload = await read_ws_frame(reader)
+        if opcode == OP_CLOSE:
+            break
+        if opcode == OP_TEXT:
+            on_snapshot(json.loads(payload))
+            received += 1
+    
+    writer.write(ws_frame(struct.pack('!H', 1000), OP_CLOSE, mask=True))
+    await writer.drain()
+    writer.close()
+
+
+def print_snapshot(snapshot: Dict):
+    totals = snapshot.get('totals', {})
+    print(f"   v{snapshot['version']} frame {snapshot['frame']}: {len(snapshot['markers'])} markers, "
+          f"{len(snapshot['creep_clusters'])} creep clusters, totals {totals}")
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Live tracker service stub client")
+    parser.add_argument('command', choices=['client'])
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--count', type=int, default=5, help="snapshots to receive from /subscribe")
+    parser.add_argument('--heatmap', help="save /heatmap.png here")
+    args = parser.parse_args()
+    
+    async def main():
+        status, body = await fetch(args.host, args.port, '/state')
+        print(f"✅ /state {status}")
+        print_snapshot(json.loads(body))
+        
+        if args.heatmap:
+            status, body = await fetch(args.host, args.port, '/heatmap.png')
+            with open(args.heatmap, 'wb') as f:
+                f.write(body)
+            print(f"✅ /heatmap.png {status} -> {args.heatmap}")
+        
+        print(f"📡 /subscribe ({args.count} snapshots)")
+        await subscribe(args.host, args.port, args.count, print_snapshot)
+    
+    try:
+        asyncio.run(main())
+    except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+        print(f"❌ Service unavailable: {e}")
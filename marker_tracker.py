@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Multi-target Pokemon marker tracker
+- Constant-velocity prediction per track
+- Greedy nearest-first assignment (gated by distance, team and radius)
+- Circle search only in small windows around predicted positions;
+  a full-minimap search every FULL_SEARCH_INTERVAL frames and when a
+  confirmed track has just missed TRACK_LOST_FRAMES window searches in a
+  row (once per loss; tentative and unrecovered tracks coast and expire)
+- Stable track ids and per-player trajectories
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from pokemon_detector import detect_pokemon_markers, ENGINE_HOUGH, MARKER_MIN_DIST
+from instrumentation import stage, incr
+
+FULL_SEARCH_INTERVAL = 30  # frames between full-minimap searches
+TRACK_WINDOW = 12  # search margin (px) around a predicted marker
+TRACK_MAX_DISTANCE = 30  # max px between prediction and detection to assign
+TRACK_MAX_MISSES = 5  # frames a track can go unseen before it is closed
+TRACK_CONFIRM_HITS = 3  # detections before a track is confirmed
+TRACK_LOST_FRAMES = 2  # consecutive misses of a confirmed track that trigger a full search
+TRACK_RADIUS_TOLERANCE = 3  # max radius change (px) between a track and its match
+VELOCITY_SMOOTHING = 0.5  # weight of the newest velocity estimate
+
+
+class Track:
+    """One marker followed across frames"""
+    
+    def __init__(self, track_id: int, frame_idx: int, marker: Dict):
+        self.id = track_id
+        self.team = marker['team']
+        self.position = np.array(marker['position'], dtype=np.float64)
+        self.velocity = np.zeros(2)
+        self.radius = marker['radius']
+        self.last_frame = frame_idx
+        self.hits = 1
+        self.misses = 0
+        self.points = [(frame_idx, *marker['position'])]
+    
+    def predict(self, frame_idx: int) -> np.ndarray:
+        return self.position + self.velocity * (frame_idx - self.last_frame)
+    
+    def update(self, frame_idx: int, marker: Dict):
+        position = np.array(marker['position'], dtype=np.float64)
+        step = frame_idx - self.last_frame
+        if step > 0:
+            velocity = (position - self.position) / step
+            self.velocity = VELOCITY_SMOOTHING * velocity + (1 - VELOCITY_SMOOTHING) * self.velocity
+        
+        self.position = position
+        self.radius = marker['radius']
+        self.last_frame = frame_idx
+        self.hits += 1
+        self.misses = 0
+        self.points.append((frame_idx, *marker['position']))
+
+
+class MarkerTracker:
+    """
+    Track Pokemon markers frame to frame (frames must arrive in order)
+    update() returns the frame's markers in the detect_pokemon_markers
+    schema plus a 'track_id'
+    """
+    
+    def __init__(self, full_search_interval: int = FULL_SEARCH_INTERVAL, window: int = TRACK_WINDOW,
+                 max_distance: float = TRACK_MAX_DISTANCE, max_misses: int = TRACK_MAX_MISSES,
+                 confirm_hits: int = TRACK_CONFIRM_HITS, lost_frames: int = TRACK_LOST_FRAMES,
+                 engine: str = ENGINE_HOUGH):
+        self.full_search_interval = full_search_interval
+        self.window = window
+        self.max_distance = max_distance
+        self.max_misses = max_misses
+        self.confirm_hits = confirm_hits
+        self.lost_frames = lost_frames
+        self.engine = engine
+        
+        self.tracks: List[Track] = []
+        self.finished: List[Track] = []
+        self.next_id = 0
+        self.frames_since_full = 0
+        self.full_searches = 0
+        self.window_searches = 0
+        self.frame_shape = None
+    
+    def _full_search(self, minimap_img, context) -> List[Dict]:
+        self.full_searches += 1
+        self.frames_since_full = 0
+        incr('tracker.full_searches')
+        with stage('tracker.full'):
+            markers = detect_pokemon_markers(minimap_img, context=context, engine=self.engine)
+        return markers
+    
+    def _window_search(self, minimap_img, context, predictions) -> List[Dict]:
+        """Search a window around each prediction, dropping repeats where windows overlap"""
+        height, width = minimap_img.shape[:2]
+        markers = []
+        
+        with stage('tracker.windows'):
+            for track, (px, py) in zip(self.tracks, predictions):
+                margin = track.radius + self.window
+                roi = (max(int(px) - margin, 0), max(int(py) - margin, 0),
+                       min(int(px) + margin + 1, width), min(int(py) + margin + 1, height))
+                if roi[0] >= roi[2] or roi[1] >= roi[3]:
+                    continue
+                
+                self.window_searches += 1
+                found = detect_pokemon_markers(minimap_img, context=context, engine=self.engine, roi=roi)
+                for marker in found:
+                    x, y = marker['position']
+                    if all((x - m['position'][0]) ** 2 + (y - m['position'][1]) ** 2 >= MARKER_MIN_DIST ** 2
+                           for m in markers):
+                        markers.append(marker)
+        
+        incr('tracker.window_searches', len(self.tracks))
+        return markers
+    
+    def _assign(self, predictions, markers) -> Tuple[Dict[int, int], List[int]]:
+        """
+        Greedy nearest-first matching of tracks to markers within max_distance
+        Only a marker of the track's team and of a similar radius can match,
+        so a track never jumps to another player's marker
+        Returns ({track index: marker index}, unmatched marker indices)
+        """
+        matches = {}
+        if self.tracks and markers:
+            positions = np.array([m['position'] for m in markers], dtype=np.float64)
+            dist = np.linalg.norm(predictions[:, None, :] - positions[None, :, :], axis=2)
+            teams = np.array([m['team'] for m in markers])
+            radii = np.array([m['radius'] for m in markers])
+            allowed = ((np.array([t.team for t in self.tracks])[:, None] == teams[None, :]) &
+                       (np.abs(np.array([t.radius for t in self.tracks])[:, None] - radii[None, :])
+                        <= TRACK_RADIUS_TOLERANCE) &
+                       (dist <= self.max_distance))
+            
+            used = set()
+            for flat in np.argsort(dist, axis=None, kind='stable'):
+                ti, mi = divmod(int(flat), len(markers))
+                if dist[ti, mi] > self.max_distance:
+                    break
+                if ti in matches or mi in used or not allowed[ti, mi]:
+                    continue
+                matches[ti] = mi
+                used.add(mi)
+        
+        unmatched = [mi for mi in range(len(markers)) if mi not in matches.values()]
+        return matches, unmatched
+    
+    def _near(self, prediction, markers) -> bool:
+        return any(np.linalg.norm(prediction - np.array(m['position'])) < MARKER_MIN_DIST for m in markers)
+    
+    def _duplicates(self, predictions, markers, matches) -> set:
+        """
+        Unmatched tentative tracks predicted onto a marker another track took
+        (e.g. spawned when the marker's team classification flickered)
+        """
+        taken = [markers[mi] for mi in matches.values()]
+        return {ti for ti, track in enumerate(self.tracks)
+                if ti not in matches and ti < len(predictions) and track.hits < self.confirm_hits
+                and self._near(predictions[ti], taken)}
+    
+    def _lost(self, predictions, markers, matches) -> bool:
+        """
+        True when a confirmed track has just missed its lost_frames-th search
+        in a row with no marker at all near its prediction (a marker that is
+        there but failed the team/radius gate would not be found by a full
+        search either). Each loss triggers one full search; a track it does
+        not recover coasts until it expires
+        """
+        return any(track.hits >= self.confirm_hits and track.misses + 1 == self.lost_frames
+                   and not self._near(predictions[ti], markers)
+                   for ti, track in enumerate(self.tracks) if ti not in matches and ti < len(predictions))
+    
+    def update(self, frame_idx: int, minimap_img: np.ndarray, context=None) -> List[Dict]:
+        """Detect and assign this frame's markers"""
+        # A new minimap size means the coordinates changed; start over
+        if self.frame_shape != minimap_img.shape[:2]:
+            self.finished.extend(self.tracks)
+            self.tracks = []
+            self.frame_shape = minimap_img.shape[:2]
+        
+        predictions = np.array([t.predict(frame_idx) for t in self.tracks]).reshape(-1, 2)
+        self.frames_since_full += 1
+        
+        full = not self.tracks or self.frames_since_full >= self.full_search_interval
+        if full:
+            markers = self._full_search(minimap_img, context)
+        else:
+            markers = self._window_search(minimap_img, context, predictions)
+        
+        with stage('tracker.assign'):
+            matches, unmatched = self._assign(predictions, markers)
+            duplicates = self._duplicates(predictions, markers, matches)
+        
+        # A confirmed track missing several windows in a row has probably
+        # jumped out of its window; one-off misses (Hough flicker) and
+        # tentative tracks just coast
+        if not full and self._lost(predictions, markers, matches):
+            markers = self._full_search(minimap_img, context)
+            with stage('tracker.assign'):
+                matches, unmatched = self._assign(predictions, markers)
+                duplicates = self._duplicates(predictions, markers, matches)
+        
+        results = []
+        for ti, mi in matches.items():
+            self.tracks[ti].update(frame_idx, markers[mi])
+            results.append(dict(markers[mi], track_id=self.tracks[ti].id))
+        
+        for mi in unmatched:
+            track = Track(self.next_id, frame_idx, markers[mi])
+            self.next_id += 1
+            self.tracks.append(track)
+            results.append(dict(markers[mi], track_id=track.id))
+        
+        # Unseen tracks coast on their prediction until they run out of misses;
+        # duplicates of a matched track are closed straight away
+        alive = []
+        for ti, track in enumerate(self.tracks):
+            if ti < len(predictions) and ti not in matches:
+                track.misses += 1
+            if track.misses > self.max_misses or ti in duplicates:
+                self.finished.append(track)
+            else:
+                alive.append(track)
+        self.tracks = alive
+        
+        results.sort(key=lambda m: m['track_id'])
+        return results
+    
+    def trajectories(self, min_hits: int = 1) -> Dict[int, Dict]:
+        """{track_id: {'team', 'points': [(frame_idx, x, y)]}} for every track seen"""
+        return {t.id: {'team': t.team, 'points': list(t.points)}
+                for t in sorted(self.finished + self.tracks, key=lambda t: t.id)
+                if t.hits >= min_hits}
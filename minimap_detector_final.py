@@ -11,9 +11,126 @@ import cv2
 import numpy as np
 from pathlib import Path
 
-def auto_detect_minimap_final(screenshot):
+from instrumentation import stage, incr
+
+def find_densest_cell(circles, search_w, search_h, cell_size=180, stride=30):
+    """
+    Find the cell_size x cell_size window holding the most circle centers
+    Each center adds +1 to the block of window origins that contain it in a
+    2D difference grid; a summed-area pass turns that into per-window counts,
+    so cost is O(circles + windows) instead of windows x circles
+    Returns (count, center_x, center_y)
+    """
+    # Window origins scanned (same grid as the original nested loop)
+    nx = len(range(0, max(1, search_w - cell_size), stride))
+    ny = len(range(0, max(1, search_h - cell_size), stride))
+    
+    fx = np.floor(circles[:, 0]).astype(np.int64)
+    fy = np.floor(circles[:, 1]).astype(np.int64)
+    
+    # Origin index ranges [lo, hi] whose window contains each center
+    x_lo = np.maximum(0, -((cell_size - 1 - fx) // stride))
+    x_hi = np.minimum(nx - 1, fx // stride)
+    y_lo = np.maximum(0, -((cell_size - 1 - fy) // stride))
+    y_hi = np.minimum(ny - 1, fy // stride)
+    keep = (fx >= 0) & (fy >= 0) & (x_lo <= x_hi) & (y_lo <= y_hi)
+    x_lo, x_hi, y_lo, y_hi = x_lo[keep], x_hi[keep] + 1, y_lo[keep], y_hi[keep] + 1
+    
+    diff = np.zeros((ny + 1, nx + 1), dtype=np.int64)
+    np.add.at(diff, (y_lo, x_lo), 1)
+    np.add.at(diff, (y_lo, x_hi), -1)
+    np.add.at(diff, (y_hi, x_lo), -1)
+    np.add.at(diff, (y_hi, x_hi), 1)
+    density = diff.cumsum(axis=0).cumsum(axis=1)[:ny, :nx]
+    
+    # First maximum in scan order (rows of y, then x)
+    best = np.unravel_index(np.argmax(density), density.shape)
+    best_density = int(density[best])
+    if best_density == 0:
+        return 0, 0, 0
+    
+    return (best_density,
+            int(best[1]) * stride + cell_size // 2,
+            int(best[0]) * stride + cell_size // 2)
+
+
+def find_icon_circles(gray, scale=1.0):
+    """
+    HoughCircles tuned for minimap Pokemon icons
+    scale < 1 adapts the radii/spacing for a downsampled image
+    Returns an N x 3 array (cx, cy, r) or None
+    """
+    circles = cv2.HoughCircles(
+        gray,
+        cv2.HOUGH_GRADIENT,
+        dp=1,
+        minDist=max(1, 8 * scale),
+        param1=50,
+        param2=max(6, int(round(12 * scale))),
+        minRadius=max(1, int(5 * scale)),
+        maxRadius=int(round(18 * scale))
+    )
+    return None if circles is None else circles[0]
+
+
+def find_icon_circles_pyramid(gray, levels=1, cell_size=180, stride=30, margin=48):
+    """
+    Coarse-to-fine icon search
+    Locates the densest icon cluster on a 2**levels downsampled image, then
+    runs the full-resolution Hough only in a window around it
+    Falls back to the full-resolution search when the coarse pass finds no
+    cluster or the refined densest cell is not where the coarse one was
+    (a denser cluster may lie outside the window)
+    Returns circles in full-resolution coordinates (N x 3) or None
+    """
+    factor = 2 ** levels
+    search_h, search_w = gray.shape[:2]
+    
+    small = cv2.resize(gray, (search_w // factor, search_h // factor), interpolation=cv2.INTER_AREA)
+    with stage('minimap.hough_coarse'):
+        coarse = find_icon_circles(small, scale=1.0 / factor)
+    
+    density = 0
+    if coarse is not None and len(coarse) >= 5:
+        coarse_stride = max(1, stride // factor)
+        density, center_x, center_y = find_densest_cell(
+            coarse, small.shape[1], small.shape[0],
+            cell_size=cell_size // factor, stride=coarse_stride)
+    
+    circles = None
+    if density >= 5:
+        # Window holding every circle the fine pass can select (150px + radius)
+        center_x, center_y = center_x * factor, center_y * factor
+        half = cell_size // 2 + 150 + 18 + margin
+        x1, y1 = max(0, center_x - half), max(0, center_y - half)
+        x2, y2 = min(search_w, center_x + half), min(search_h, center_y + half)
+        
+        with stage('minimap.hough'):
+            circles = find_icon_circles(gray[y1:y2, x1:x2])
+        
+        if circles is not None:
+            circles[:, 0] += x1
+            circles[:, 1] += y1
+            
+            # The refined densest cell must be the coarse one (within one coarse grid step)
+            tolerance = (coarse_stride + 1) * factor
+            fine_density, fine_x, fine_y = find_densest_cell(circles, search_w, search_h,
+                                                             cell_size=cell_size, stride=stride)
+            if fine_density < 5 or abs(fine_x - center_x) > tolerance or abs(fine_y - center_y) > tolerance:
+                circles = None
+    
+    if circles is None:
+        incr('minimap.pyramid_fallback')
+        with stage('minimap.hough'):
+            circles = find_icon_circles(gray)
+    return circles
+
+
+def auto_detect_minimap_final(screenshot, cell_size=180, stride=30, pyramid_levels=0):
     """
     Final minimap detection with EXACT 1:1 aspect ratio
+    pyramid_levels > 0 finds the icon cluster on a 2x/4x downsampled image
+    first and runs the full-resolution Hough only around it
     """
     height, width = screenshot.shape[:2]
     
@@ -30,37 +147,21 @@ def auto_detect_minimap_final(screenshot):
     gray = cv2.cvtColor(search_region, cv2.COLOR_BGR2GRAY)
     
     # Find circles (Pokemon icons)
-    circles = cv2.HoughCircles(
-        gray,
-        cv2.HOUGH_GRADIENT,
-        dp=1,
-        minDist=8,
-        param1=50,
-        param2=12,
-        minRadius=5,
-        maxRadius=18
-    )
+    if pyramid_levels > 0:
+        circles = find_icon_circles_pyramid(gray, pyramid_levels, cell_size, stride)
+    else:
+        with stage('minimap.hough'):
+            circles = find_icon_circles(gray)
     
-    if circles is None or len(circles[0]) < 5:
+    if circles is None or len(circles) < 5:
         return None
     
-    circles = circles[0]
+    incr('minimap.circles', len(circles))
     
     # Find densest cluster
-    cell_size = 180
-    best_density = 0
-    best_center_x = 0
-    best_center_y = 0
-    
-    for y in range(0, max(1, search_h - cell_size), 30):
-        for x in range(0, max(1, search_w - cell_size), 30):
-            count = sum(1 for c in circles 
-                       if x <= c[0] < x + cell_size and y <= c[1] < y + cell_size)
-            
-            if count > best_density:
-                best_density = count
-                best_center_x = x + cell_size // 2
-                best_center_y = y + cell_size // 2
+    with stage('minimap.density'):
+        best_density, best_center_x, best_center_y = find_densest_cell(
+            circles, search_w, search_h, cell_size=cell_size, stride=stride)
     
     if best_density < 5:
         return None
@@ -166,6 +267,94 @@ def auto_detect_minimap_final(screenshot):
     return (global_x1, global_y1, global_x2, global_y2)
 
 
+class MinimapLocator:
+    """
+    Keeps the last minimap box and only re-runs auto_detect_minimap_final
+    when a cheap check fails or every redetect_interval frames
+    The check correlates a small grayscale thumbnail of the ROI against the
+    thumbnail taken at detection time (minimap art barely changes in a match)
+    """
+    
+    def __init__(self, redetect_interval=300, min_correlation=0.8, thumb_size=64, pyramid_levels=0):
+        self.redetect_interval = redetect_interval
+        self.pyramid_levels = pyramid_levels
+        self.min_correlation = min_correlation
+        self.thumb_size = thumb_size
+        
+        self.box = None
+        self.template = None
+        self.frames_since_detect = 0
+        self.detections = 0
+        self.validation_failures = 0
+    
+    @property
+    def grab_bbox(self):
+        """Box in (left, top, right, bottom) form for ImageGrab.grab(bbox=...)"""
+        return self.box
+    
+    def _thumbnail(self, minimap):
+        gray = cv2.cvtColor(minimap, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, (self.thumb_size, self.thumb_size), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(thumb, (3, 3), 0)
+    
+    def invalidate(self):
+        self.box = None
+        self.template = None
+    
+    def detect(self, screenshot):
+        """
+        Full detection; caches the box and its thumbnail
+        A failed detection keeps the previous box (e.g. a menu covers the map)
+        """
+        box = auto_detect_minimap_final(screenshot, pyramid_levels=self.pyramid_levels)
+        self.frames_since_detect = 0
+        self.detections += 1
+        
+        if box is None:
+            return None
+        
+        x1, y1, x2, y2 = box
+        self.box = box
+        self.template = self._thumbnail(screenshot[y1:y2, x1:x2])
+        return box
+    
+    def validate(self, minimap):
+        """Cheap check that an already-cropped ROI still shows the minimap"""
+        if self.template is None or minimap is None or minimap.size == 0:
+            return False
+        
+        score = cv2.matchTemplate(self._thumbnail(minimap), self.template, cv2.TM_CCOEFF_NORMED)[0, 0]
+        if score < self.min_correlation:
+            self.validation_failures += 1
+            return False
+        return True
+    
+    def needs_redetect(self):
+        return self.box is None or self.frames_since_detect >= self.redetect_interval
+    
+    def check(self, minimap):
+        """
+        Per-frame check on the ROI grabbed at self.box
+        False means the caller should run detect() on a full screenshot
+        """
+        self.frames_since_detect += 1
+        if self.needs_redetect():
+            return False
+        return self.validate(minimap)
+    
+    def locate(self, screenshot):
+        """
+        Return the minimap box for a full screenshot
+        Reuses the cached box while it validates, otherwise re-detects
+        """
+        if self.box is not None:
+            x1, y1, x2, y2 = self.box
+            if self.check(screenshot[y1:y2, x1:x2]):
+                return self.box
+        
+        return self.detect(screenshot)
+
+
 if __name__ == "__main__":
     output_dir = Path('outputs')
     output_dir.mkdir(exist_ok=True)
@@ -199,10 +388,8 @@ if __name__ == "__main__":
             cv2.imwrite(str(output_dir / 'FINAL_minimap_1to1.png'), minimap)
             
             # Mark on screenshot
-            marked = screenshot.copy()
-            cv2.rectangle(marked, (x1, y1), (x2, y2), (0, 255, 0), 3)
-            cv2.putText(marked, f"FINAL {final_w}x{final_h} (1:1)", (x1-20, y1-10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            from visualize import draw_minimap_box
+            marked = draw_minimap_box(screenshot.copy(), coords, f"FINAL {final_w}x{final_h} (1:1)")
             cv2.imwrite(str(output_dir / 'FINAL_marked_1to1.png'), marked)
             
             print(f"\n✅ Saved to outputs/")
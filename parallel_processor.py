@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Parallel frame processing
+- Frames are spread over a pool of worker processes
+- Pixels travel through multiprocessing.shared_memory ring slots
+  (only the slot number and shape are pickled)
+- Results come back in frame order
+"""
+
+import os
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from frame_context import analyze_frame, USE_LABEL_TABLE
+from pixel_labels import get_label_table
+
+# Worker-side handle on the parent's ring buffer
+_worker_shm = None
+
+
+def _attach_ring(name: str):
+    global _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=name)
+    # Pool workers skip atexit; multiprocessing finalizers run on worker exit
+    util.Finalize(None, _detach_ring, exitpriority=10)
+
+
+def _detach_ring():
+    global _worker_shm
+    if _worker_shm is not None:
+        _worker_shm.close()
+        _worker_shm = None
+
+
+def _strip_result(result: Dict) -> Dict:
+    """Drop the per-frame context (large arrays) before sending results back"""
+    return {k: v for k, v in result.items() if k != 'context'}
+
+
+def _process_slot(slot: int, slot_bytes: int, shape: Tuple[int, ...],
+                  reference_size: Optional[Tuple[int, int]] = None) -> Dict:
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=_worker_shm.buf, offset=slot * slot_bytes)
+    return _strip_result(analyze_frame(frame, reference_size=reference_size))
+
+
+def _process_array(frame: np.ndarray, reference_size: Optional[Tuple[int, int]] = None) -> Dict:
+    return _strip_result(analyze_frame(frame, reference_size=reference_size))
+
+
+class ParallelFrameProcessor:
+    """
+    Run analyze_frame over many frames on a process pool
+    The ring has `slots` frame buffers; at most that many frames are in
+    flight (oversized, pickled frames included), so memory stays bounded
+    however long the input is
+    reference_size is passed through to analyze_frame (reference-scale mode)
+    """
+    
+    def __init__(self, workers: Optional[int] = None, slots: Optional[int] = None,
+                 slot_bytes: Optional[int] = None, reference_size: Optional[Tuple[int, int]] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = slots or 2 * self.workers
+        self.slot_bytes = slot_bytes
+        self.reference_size = reference_size
+        self.frames_pickled = 0
+    
+    def map(self, frames: Iterable[Tuple[int, np.ndarray]]) -> Iterator[Tuple[int, Tuple[int, int], Dict]]:
+        """
+        Analyze (frame_idx, minimap) pairs
+        Yields (frame_idx, (height, width), result) in input order
+        """
+        frames = iter(frames)
+        first = None
+        for idx, img in frames:
+            if img is not None:
+                first = (idx, img)
+                break
+        if first is None:
+            return
+        
+        # Size slots from the first frame, with headroom for re-detected boxes
+        slot_bytes = self.slot_bytes or int(first[1].nbytes * 1.5)
+        shm = shared_memory.SharedMemory(create=True, size=slot_bytes * self.slots)
+        
+        # Built before the pool forks, so workers share one copy-on-write table
+        if USE_LABEL_TABLE:
+            get_label_table()
+        
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_attach_ring,
+                                     initargs=(shm.name,)) as pool:
+                pending = deque()
+                free_slots = deque(range(self.slots))
+                
+                def submit(idx, img):
+                    img = np.ascontiguousarray(img, dtype=np.uint8)
+                    if img.nbytes > slot_bytes:
+                        # Oversized frame: fall back to pickling it
+                        self.frames_pickled += 1
+                        pending.append((idx, img.shape[:2], None, pool.submit(_process_array, img, self.reference_size)))
+                        return
+                    
+                    slot = free_slots.popleft()
+                    view = np.ndarray(img.shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                    view[...] = img
+                    pending.append((idx, img.shape[:2], slot,
+                                    pool.submit(_process_slot, slot, slot_bytes, img.shape,
+                                                self.reference_size)))
+                
+                def collect():
+                    idx, shape, slot, future = pending.popleft()
+                    result = future.result()
+                    if slot is not None:
+                        free_slots.append(slot)
+                    return idx, shape, result
+                
+                submit(*first)
+                for idx, img in frames:
+                    if img is None:
+                        continue
+                    # Pickled frames hold no slot but count against the same limit
+                    if len(pending) >= self.slots:
+                        yield collect()
+                    submit(idx, img)
+                
+                while pending:
+                    yield collect()
+        finally:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+One-pass pixel labeling through a BGR lookup table
+- Every 24-bit BGR colour is classified once against the detectors' HSV
+  thresholds (white, orange, purple, creep, objective)
+- A frame becomes a uint8 label image (one bit per class) with a single gather
+- Full resolution table (16 MB), so labels match cvtColor + inRange exactly
+- Built once per process in chunks (a few MB of scratch), under a lock;
+  build it before forking workers so they share it copy-on-write
+"""
+
+import threading
+import cv2
+import numpy as np
+
+# Class bits
+LABEL_WHITE = 1
+LABEL_ORANGE = 2
+LABEL_PURPLE = 4
+LABEL_CREEP = 8
+LABEL_OBJECTIVE = 16
+
+TABLE_CHUNK_ROWS = 256  # rows of 4096 colours classified per step (1M colours, ~8 MB scratch)
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def class_ranges():
+    """(bit, HSV lower, HSV upper) for every class, read from the detector modules"""
+    # Imported here: the detectors import this module for the label bits
+    import pokemon_detector as pd
+    import creep_objective_detector_final_v2 as cod
+    
+    return [
+        (LABEL_WHITE, pd.WHITE_HSV_LOWER, pd.WHITE_HSV_UPPER),
+        (LABEL_ORANGE, pd.ORANGE_HSV_LOWER, pd.ORANGE_HSV_UPPER),
+        (LABEL_PURPLE, pd.PURPLE_HSV_LOWER, pd.PURPLE_HSV_UPPER),
+        (LABEL_CREEP, cod.CREEP_HSV_LOWER, cod.CREEP_HSV_UPPER),
+        (LABEL_OBJECTIVE, cod.OBJ_HSV_LOWER, cod.OBJ_HSV_UPPER),
+    ]
+
+
+def get_label_table() -> np.ndarray:
+    """
+    Class bits for every colour, indexed by the little-endian uint32 of a
+    BGRA pixel with alpha 0 (b | g << 8 | r << 16). Built on first use (~0.5s)
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = _build_label_table()
+    return _table
+
+
+def _build_label_table() -> np.ndarray:
+    ranges = [(bit, np.array(lower), np.array(upper)) for bit, lower, upper in class_ranges()]
+    table = np.zeros((4096, 4096), dtype=np.uint8)
+    
+    for row in range(0, 4096, TABLE_CHUNK_ROWS):
+        index = np.arange(row * 4096, (row + TABLE_CHUNK_ROWS) * 4096, dtype=np.uint32)
+        bgr = np.stack([index & 255, (index >> 8) & 255, index >> 16], axis=-1).astype(np.uint8)
+        hsv = cv2.cvtColor(bgr.reshape(TABLE_CHUNK_ROWS, 4096, 3), cv2.COLOR_BGR2HSV)
+        
+        chunk = table[row:row + TABLE_CHUNK_ROWS]
+        for bit, lower, upper in ranges:
+            chunk[cv2.inRange(hsv, lower, upper) != 0] |= bit
+    
+    table = table.reshape(-1)
+    table.flags.writeable = False
+    return table
+
+
+def label_image(img: np.ndarray) -> np.ndarray:
+    """Label image (same leading shape as img) for a BGR frame or a stack of frames"""
+    shape = img.shape[:-1]
+    bgra = cv2.cvtColor(np.ascontiguousarray(img).reshape(-1, shape[-1], 3), cv2.COLOR_BGR2BGRA)
+    bgra[..., 3] = 0
+    return np.take(get_label_table(), bgra.view(np.uint32)[..., 0]).reshape(shape)
+
+
+def class_mask(labels: np.ndarray, bit: int) -> np.ndarray:
+    """0/255 uint8 mask of one class, like cv2.inRange would return"""
+    return cv2.compare(cv2.bitwise_and(labels, bit), 0, cv2.CMP_GT)
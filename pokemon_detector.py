@@ -1,97 +1,430 @@
 #!/usr/bin/env python3
 """
 Perfect Circle Pokemon Detector - FINAL TUNED VERSION
+- Stencil-based verification (only the pixels under each marker are read)
+- Two candidate engines: HoughCircles or white-core connected components
+- Batch variant over (N, H, W, 3) stacks of crops
+- as_records returns a MARKER_RECORD_DTYPE array built straight from the
+  verification counts (no per-marker dicts)
+- Returns detections only; debug overlays are drawn by visualize.py
 """
 
 import cv2
 import numpy as np
+from functools import lru_cache
 
-def detect_pokemon_markers(minimap_img):
+from instrumentation import stage, incr, is_enabled
+from detection_store import MARKER_RECORD_DTYPE
+from pixel_labels import LABEL_WHITE, LABEL_ORANGE, LABEL_PURPLE, class_mask
+
+# White center
+WHITE_HSV_LOWER = [0, 0, 210]
+WHITE_HSV_UPPER = [180, 35, 255]
+
+# Team rings
+ORANGE_HSV_LOWER = [0, 70, 70]
+ORANGE_HSV_UPPER = [30, 255, 255]
+PURPLE_HSV_LOWER = [100, 30, 30]
+PURPLE_HSV_UPPER = [160, 255, 255]
+
+# Marker geometry
+MARKER_MIN_RADIUS = 8
+MARKER_MAX_RADIUS = 14
+MIN_WHITE_PIXELS = 8
+MIN_RING_PIXELS = 5
+MARKER_MIN_DIST = 15
+
+# Candidate engines
+ENGINE_HOUGH = 'hough'
+ENGINE_COMPONENTS = 'components'
+ENGINES = (ENGINE_HOUGH, ENGINE_COMPONENTS)
+
+# White-core components: closing kernel and blob filters
+CORE_CLOSE_KERNEL = 3
+CORE_MIN_AREA = 8
+CORE_MIN_SIZE = 3
+CORE_MAX_SIZE = 28
+CORE_MIN_FILL = 0.2
+
+
+@lru_cache(maxsize=None)
+def get_marker_stencils(radius):
     """
-    Detect Pokemon markers using circle detection + white center verification.
+    Pixel offsets (dy, dx) of the white-center disc and the team ring
+    for a marker of the given radius, rasterized exactly like cv2.circle
     """
-    hsv = cv2.cvtColor(minimap_img, cv2.COLOR_BGR2HSV)
-    gray = cv2.cvtColor(minimap_img, cv2.COLOR_BGR2GRAY)
-    height, width = minimap_img.shape[:2]
+    pad = radius + 2
+    size = 2 * pad + 1
     
-    # White detection
-    lower_white = np.array([0, 0, 210])
-    upper_white = np.array([180, 35, 255])
-    white_mask = cv2.inRange(hsv, lower_white, upper_white)
+    disc = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(disc, (pad, pad), radius - 2, 255, -1)
     
-    # Detect circles
+    ring = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(ring, (pad, pad), radius, 255, 2)
+    
+    disc_dy, disc_dx = np.nonzero(disc)
+    ring_dy, ring_dx = np.nonzero(ring)
+    
+    return (disc_dy - pad, disc_dx - pad), (ring_dy - pad, ring_dx - pad)
+
+
+# Build stencils once for every radius HoughCircles can return
+for _radius in range(MARKER_MIN_RADIUS, MARKER_MAX_RADIUS + 1):
+    get_marker_stencils(_radius)
+
+
+def _edge_stencils(cx, cy, radius, height, width):
+    """
+    Stencils for a marker clipped by the image border
+    cv2.circle clips thick rings differently near the border, so these are
+    rasterized in a local window instead of cropping the cached stencil
+    """
+    pad = radius + 2
+    x0, y0 = max(cx - pad, 0), max(cy - pad, 0)
+    x1, y1 = min(cx + pad + 1, width), min(cy + pad + 1, height)
+    
+    disc = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+    cv2.circle(disc, (cx - x0, cy - y0), radius - 2, 255, -1)
+    
+    ring = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+    cv2.circle(ring, (cx - x0, cy - y0), radius, 255, 2)
+    
+    disc_dy, disc_dx = np.nonzero(disc)
+    ring_dy, ring_dx = np.nonzero(ring)
+    
+    return (disc_dy + y0 - cy, disc_dx + x0 - cx), (ring_dy + y0 - cy, ring_dx + x0 - cx)
+
+
+def _gather(img, cx, cy, offsets, frame=None):
+    """
+    Gather stencil pixels for N centers in one pass -> (N, K[, C])
+    With frame, img is a stack of frames and frame[i] picks center i's frame
+    """
+    dy, dx = offsets
+    if frame is None:
+        return img[cy[:, None] + dy[None, :], cx[:, None] + dx[None, :]]
+    return img[frame[:, None], cy[:, None] + dy[None, :], cx[:, None] + dx[None, :]]
+
+
+def _in_range(values, lower, upper):
+    return np.all((values >= lower) & (values <= upper), axis=-1)
+
+
+def _count_stencils(hsv, white_mask, cx, cy, disc, ring, frame=None, labels=None):
+    white = _gather(white_mask, cx, cy, disc, frame)
+    white_pixels = np.count_nonzero(white, axis=1)
+    
+    # Ring colour from the label image when there is one, else from HSV
+    if labels is not None:
+        ring_labels = _gather(labels, cx, cy, ring, frame)
+        orange_pixels = np.count_nonzero(ring_labels & LABEL_ORANGE, axis=1)
+        purple_pixels = np.count_nonzero(ring_labels & LABEL_PURPLE, axis=1)
+    else:
+        ring_hsv = _gather(hsv, cx, cy, ring, frame)
+        orange_pixels = np.count_nonzero(_in_range(ring_hsv, ORANGE_HSV_LOWER, ORANGE_HSV_UPPER), axis=1)
+        purple_pixels = np.count_nonzero(_in_range(ring_hsv, PURPLE_HSV_LOWER, PURPLE_HSV_UPPER), axis=1)
+    
+    return np.stack([white_pixels, orange_pixels, purple_pixels], axis=1)
+
+
+def verify_marker_candidates(hsv, white_mask, circles, frames=None, labels=None):
+    """
+    Verify Hough candidates (N x 3 array of cx, cy, radius)
+    Returns one (white_pixels, orange_pixels, purple_pixels) row per candidate
+    With frames, hsv/white_mask are (F, H, W[, 3]) stacks and frames[i] is
+    the frame candidate i belongs to; all frames are verified in one pass
+    With labels (pixel_labels image) ring colours are read from it and hsv is unused
+    """
+    circles = np.asarray(circles, dtype=np.int64).reshape(-1, 3)
+    counts = np.zeros((len(circles), 3), dtype=np.int64)
+    height, width = white_mask.shape[-2:]
+    if frames is not None:
+        frames = np.asarray(frames, dtype=np.int64)
+    
+    cx, cy, radius = circles[:, 0], circles[:, 1], circles[:, 2]
+    pad = radius + 2
+    inside = (cx >= pad) & (cy >= pad) & (cx + pad < width) & (cy + pad < height)
+    
+    # Fully inside the frame: shared stencil, one gather per radius
+    for r in np.unique(radius[inside]):
+        idx = np.nonzero(inside & (radius == r))[0]
+        disc, ring = get_marker_stencils(int(r))
+        frame = frames[idx] if frames is not None else None
+        counts[idx] = _count_stencils(hsv, white_mask, cx[idx], cy[idx], disc, ring, frame, labels)
+    
+    # Touching the border: clipped stencil per candidate
+    for i in np.nonzero(~inside)[0]:
+        disc, ring = _edge_stencils(int(cx[i]), int(cy[i]), int(radius[i]), height, width)
+        frame = frames[i:i + 1] if frames is not None else None
+        counts[i] = _count_stencils(hsv, white_mask, cx[i:i + 1], cy[i:i + 1], disc, ring, frame, labels)[0]
+    
+    return counts
+
+
+def get_white_mask(hsv):
+    """White-center mask from an HSV frame"""
+    return cv2.inRange(hsv, np.array(WHITE_HSV_LOWER), np.array(WHITE_HSV_UPPER))
+
+
+def find_hough_candidates(gray):
+    """HoughCircles candidates as an N x 3 array of (cx, cy, radius)"""
     circles = cv2.HoughCircles(
         gray,
         cv2.HOUGH_GRADIENT,
         dp=1,
-        minDist=15,
+        minDist=MARKER_MIN_DIST,
         param1=50,
         param2=15,
-        minRadius=8,
-        maxRadius=14
+        minRadius=MARKER_MIN_RADIUS,
+        maxRadius=MARKER_MAX_RADIUS
     )
     
-    markers = []
-    debug_img = minimap_img.copy()
-    
     if circles is None:
-        return markers, debug_img, white_mask
+        return np.zeros((0, 3), dtype=np.uint16)
     
-    circles = np.uint16(np.around(circles))
+    return np.uint16(np.around(circles))[0]
+
+
+def find_core_candidates(white_mask):
+    """
+    Candidates from connected white cores, as an N x 3 array of (cx, cy, radius)
+    The core is closed first so glyphs on the icon don't split it, then
+    blobs are filtered by area, bounding box and how much of the disc they fill.
+    Radius comes from the core extent plus the ring width
+    """
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (CORE_CLOSE_KERNEL, CORE_CLOSE_KERNEL))
+    cores = cv2.morphologyEx(white_mask, cv2.MORPH_CLOSE, kernel)
     
-    for circle in circles[0, :]:
-        cx, cy, radius = circle
-        
-        # Verify white center
-        circle_mask = np.zeros(white_mask.shape, dtype=np.uint8)
-        cv2.circle(circle_mask, (cx, cy), radius - 2, 255, -1)
-        
-        white_in_circle = cv2.bitwise_and(white_mask, circle_mask)
-        white_pixel_count = cv2.countNonZero(white_in_circle)
+    _, _, blob_stats, _ = cv2.connectedComponentsWithStats(cores, connectivity=8)
+    x, y, w, h, area = blob_stats[1:].T
+    
+    radius = np.clip(np.maximum(w, h) // 2 + 2, MARKER_MIN_RADIUS, MARKER_MAX_RADIUS)
+    fill = area / (np.pi * (radius - 2.0) ** 2)
+    keep = ((area >= CORE_MIN_AREA) &
+            (w >= CORE_MIN_SIZE) & (h >= CORE_MIN_SIZE) &
+            (w <= CORE_MAX_SIZE) & (h <= CORE_MAX_SIZE) &
+            (fill >= CORE_MIN_FILL))
+    
+    return np.stack([x + w // 2, y + h // 2, radius], axis=1)[keep]
+
+
+def _suppress_close(circles, counts):
+    """
+    Keep the strongest candidate (most ring pixels) within MARKER_MIN_DIST,
+    the spacing HoughCircles enforces on its own
+    """
+    order = np.argsort(-(counts[:, 1] + counts[:, 2]), kind='stable')
+    kept = []
+    for i in order:
+        cx, cy = int(circles[i, 0]), int(circles[i, 1])
+        if all((cx - int(circles[j, 0])) ** 2 + (cy - int(circles[j, 1])) ** 2 >= MARKER_MIN_DIST ** 2
+               for j in kept):
+            kept.append(i)
+    
+    kept.sort()
+    return circles[kept], counts[kept]
+
+
+def markers_from_counts(circles, counts, x0=0, y0=0):
+    """
+    Marker dicts for the candidates that pass the white-center and ring checks
+    (x0, y0) is added to move window coordinates into frame coordinates
+    """
+    markers = []
+    for circle, (white_pixel_count, orange_pixels, purple_pixels) in zip(circles, counts):
+        cx, cy, radius = int(circle[0]) + x0, int(circle[1]) + y0, int(circle[2])
         
-        if white_pixel_count < 8:
+        if white_pixel_count < MIN_WHITE_PIXELS:
             continue
         
-        # Determine team by ring color
-        ring_mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
-        cv2.circle(ring_mask, (cx, cy), radius, 255, 2)
-        
-        ring_hsv = cv2.bitwise_and(hsv, hsv, mask=ring_mask)
-        
-        # Orange
-        lower_orange = np.array([0, 70, 70])
-        upper_orange = np.array([30, 255, 255])
-        orange_mask = cv2.inRange(ring_hsv, lower_orange, upper_orange)
-        orange_pixels = cv2.countNonZero(orange_mask)
-        
-        # Purple  
-        lower_purple = np.array([100, 30, 30])
-        upper_purple = np.array([160, 255, 255])
-        purple_mask = cv2.inRange(ring_hsv, lower_purple, upper_purple)
-        purple_pixels = cv2.countNonZero(purple_mask)
-        
         total_colored = orange_pixels + purple_pixels
-        if total_colored < 5:
+        if total_colored < MIN_RING_PIXELS:
             continue
         
         # Determine team
-        if orange_pixels > purple_pixels:
-            team = "orange"
-            color = (0, 165, 255)
-        else:
-            team = "purple"
-            color = (255, 0, 255)
+        team = "orange" if orange_pixels > purple_pixels else "purple"
         
         markers.append({
-            'position': (int(cx), int(cy)),
-            'radius': int(radius),
+            'position': (cx, cy),
+            'radius': radius,
             'team': team,
-            'confidence': total_colored,
-            'white_pixels': white_pixel_count
+            'confidence': int(total_colored),
+            'white_pixels': int(white_pixel_count)
         })
-        
-        cv2.circle(debug_img, (int(cx), int(cy)), int(radius), color, 2)
-        cv2.circle(debug_img, (int(cx), int(cy)), 2, (0, 255, 0), -1)
     
-    return markers, debug_img, white_mask
+    return markers
+
+
+def marker_records_from_counts(circles, counts, frame_idx=0, x0=0, y0=0):
+    """markers_from_counts as a MARKER_RECORD_DTYPE array, filtered and filled column-wise"""
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1, 3)
+    white, orange, purple = counts[:, 0], counts[:, 1], counts[:, 2]
+    colored = orange + purple
+    keep = (white >= MIN_WHITE_PIXELS) & (colored >= MIN_RING_PIXELS)
+    circles = np.asarray(circles).reshape(-1, 3)[keep]
+    
+    records = np.zeros(len(circles), dtype=MARKER_RECORD_DTYPE)
+    records['team'] = np.where(orange[keep] > purple[keep], 'orange', 'purple')
+    records['frame'] = frame_idx
+    records['x'] = circles[:, 0].astype(np.int64) + x0
+    records['y'] = circles[:, 1].astype(np.int64) + y0
+    records['radius'] = circles[:, 2].astype(np.int64)
+    records['confidence'] = colored[keep]
+    records['white_pixels'] = white[keep]
+    return records
 
+
+def detect_pokemon_markers(minimap_img, context=None, engine=ENGINE_HOUGH, roi=None,
+                           as_records=False, frame_idx=0):
+    """
+    Detect Pokemon markers using circle detection + white center verification.
+    Pass a FrameContext to reuse its HSV/gray conversions (or label image) and white mask.
+    engine picks the candidate source: 'hough' (HoughCircles on gray) or
+    'components' (connected white cores); both verify and report the same way.
+    roi (x0, y0, x1, y1) searches only that window: it is converted with a
+    marker-sized border so verification sees the same pixels as a full pass,
+    and only markers centred inside the window are kept.
+    Returns the list of markers (visualize.draw_markers renders them), or with
+    as_records a MARKER_RECORD_DTYPE array tagged with frame_idx.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown marker engine {engine!r}, expected one of {ENGINES}")
+    
+    height, width = minimap_img.shape[:2]
+    if roi is not None:
+        pad = MARKER_MAX_RADIUS + 2
+        x0, y0 = max(int(roi[0]) - pad, 0), max(int(roi[1]) - pad, 0)
+        x1, y1 = min(int(roi[2]) + pad, width), min(int(roi[3]) + pad, height)
+    else:
+        x0, y0, x1, y1 = 0, 0, width, height
+    region = np.s_[y0:y1, x0:x1]
+    
+    with stage('markers.convert'):
+        labels = None
+        if context is not None:
+            gray, white_mask = context.gray[region], context.white_mask[region]
+            if context.use_labels:
+                hsv, labels = None, context.labels[region]
+            else:
+                hsv = context.hsv[region]
+        else:
+            window = minimap_img[region]
+            hsv = cv2.cvtColor(window, cv2.COLOR_BGR2HSV)
+            gray = cv2.cvtColor(window, cv2.COLOR_BGR2GRAY)
+            
+            # White detection
+            white_mask = get_white_mask(hsv)
+    
+    # Detect circles
+    with stage(f'markers.{engine}'):
+        if engine == ENGINE_HOUGH:
+            circles = find_hough_candidates(gray)
+        else:
+            circles = find_core_candidates(white_mask)
+    
+    if roi is not None and len(circles):
+        cx, cy = circles[:, 0].astype(np.int64) + x0, circles[:, 1].astype(np.int64) + y0
+        circles = circles[(cx >= roi[0]) & (cx < roi[2]) & (cy >= roi[1]) & (cy < roi[3])]
+    
+    if len(circles) == 0:
+        return np.zeros(0, dtype=MARKER_RECORD_DTYPE) if as_records else []
+    
+    # Verify white center + ring color for all candidates at once
+    with stage('markers.verify'):
+        counts = verify_marker_candidates(hsv, white_mask, circles, labels=labels)
+        if engine == ENGINE_COMPONENTS:
+            circles, counts = _suppress_close(circles, counts)
+    
+    if is_enabled():
+        has_white = counts[:, 0] >= MIN_WHITE_PIXELS
+        has_ring = counts[:, 1] + counts[:, 2] >= MIN_RING_PIXELS
+        incr('markers.candidates', len(circles))
+        incr('markers.rejected_white', np.count_nonzero(~has_white))
+        incr('markers.rejected_ring', np.count_nonzero(has_white & ~has_ring))
+    
+    if as_records:
+        return marker_records_from_counts(circles, counts, frame_idx, x0, y0)
+    return markers_from_counts(circles, counts, x0, y0)
+
+
+def detect_pokemon_markers_batch(frames, hsv=None, gray=None, engine=ENGINE_HOUGH, labels=None,
+                                 frame_indices=None):
+    """
+    detect_pokemon_markers over an (N, H, W, 3) stack of same-size crops
+    Colour conversions, the white mask and ring/center verification run once
+    for the whole stack; candidate search stays per frame (a Hough accumulator
+    or component labelling would bleed across frame boundaries).
+    With labels (pixel_labels image of the stack) no HSV conversion is done.
+    Returns one marker list per frame, or with frame_indices one
+    MARKER_RECORD_DTYPE array per frame tagged with its index
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown marker engine {engine!r}, expected one of {ENGINES}")
+    
+    count, height, width = frames.shape[:3]
+    if count == 0:
+        return []
+    
+    with stage('markers.convert'):
+        flat = frames.reshape(count * height, width, 3)
+        if gray is None and engine == ENGINE_HOUGH:
+            gray = cv2.cvtColor(flat, cv2.COLOR_BGR2GRAY).reshape(frames.shape[:3])
+        if labels is not None:
+            white_mask = class_mask(labels.reshape(count * height, width), LABEL_WHITE).reshape(frames.shape[:3])
+        else:
+            if hsv is None:
+                hsv = cv2.cvtColor(flat, cv2.COLOR_BGR2HSV).reshape(frames.shape)
+            white_mask = get_white_mask(hsv.reshape(count * height, width, 3)).reshape(frames.shape[:3])
+    
+    with stage(f'markers.{engine}'):
+        per_frame = [find_hough_candidates(gray[i]) if engine == ENGINE_HOUGH
+                     else find_core_candidates(white_mask[i])
+                     for i in range(count)]
+    
+    circles = np.concatenate([c.astype(np.int64).reshape(-1, 3) for c in per_frame])
+    owner = np.repeat(np.arange(count), [len(c) for c in per_frame])
+    
+    with stage('markers.verify'):
+        counts = verify_marker_candidates(hsv, white_mask, circles, frames=owner, labels=labels)
+    
+    results = []
+    for i in range(count):
+        mine = owner == i
+        frame_circles, frame_counts = circles[mine], counts[mine]
+        if engine == ENGINE_COMPONENTS and len(frame_circles):
+            frame_circles, frame_counts = _suppress_close(frame_circles, frame_counts)
+        if frame_indices is not None:
+            results.append(marker_records_from_counts(frame_circles, frame_counts, frame_indices[i]))
+        else:
+            results.append(markers_from_counts(frame_circles, frame_counts))
+    
+    return results
+
+
+def compare_engines(minimap_img, tolerance=5):
+    """
+    Run both engines on one frame and pair up their markers
+    Returns {'matched': [(hough, components)], 'hough_only': [...], 'components_only': [...]}
+    """
+    hough = detect_pokemon_markers(minimap_img, engine=ENGINE_HOUGH)
+    components = detect_pokemon_markers(minimap_img, engine=ENGINE_COMPONENTS)
+    
+    matched = []
+    unmatched = list(components)
+    hough_only = []
+    for marker in hough:
+        hx, hy = marker['position']
+        best = None
+        for other in unmatched:
+            ox, oy = other['position']
+            dist = np.hypot(hx - ox, hy - oy)
+            if dist <= tolerance and (best is None or dist < best[0]):
+                best = (dist, other)
+        
+        if best is None:
+            hough_only.append(marker)
+        else:
+            matched.append((marker, best[1]))
+            unmatched.remove(best[1])
+    
+    return {'matched': matched, 'hough_only': hough_only, 'components_only': unmatched}
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Multi-session store
+- One SQLite file indexes every tracked match by date, map and team channel
+- Each session keeps its heatmaps (reference-map coordinates) as compressed
+  float32 blobs, so cross-match queries are array sums
+- Sessions come straight from the tracker or from existing tracking_data_*.json
+
+Usage:
+    python session_store.py ingest outputs/tracking_data_*.json
+    python session_store.py list --last 20
+    python session_store.py query purple --last 50 --out purple_last50.npy
+"""
+
+import json
+import re
+import sqlite3
+import zlib
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from heatmap_accumulator import HeatmapAccumulator, CHANNELS
+
+DEFAULT_DB = Path("outputs") / "sessions.db"
+DEFAULT_MAP = 'theiaskyruins'
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    source TEXT UNIQUE,
+    started_at TEXT NOT NULL,
+    map TEXT NOT NULL,
+    duration INTEGER,
+    fps REAL,
+    height INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_map_started ON sessions (map, started_at);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started_at);
+CREATE TABLE IF NOT EXISTS heatmaps (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    channel TEXT NOT NULL,
+    total REAL NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (session_id, channel)
+);
+CREATE INDEX IF NOT EXISTS heatmaps_channel ON heatmaps (channel, session_id);
+"""
+
+# tracking_data_YYYYmmdd_HHMMSS.json
+_TIMESTAMP_RE = re.compile(r'(\d{8}_\d{6})')
+
+
+def encode_heatmap(hist: np.ndarray) -> bytes:
+    return zlib.compress(np.ascontiguousarray(hist, dtype=np.float32).tobytes(), 1)
+
+
+def decode_heatmap(blob: bytes, height: int, width: int) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(blob), dtype=np.float32).reshape(height, width)
+
+
+def _timestamp(value) -> str:
+    """ISO timestamp from a datetime, an ISO string or a YYYYmmdd_HHMMSS stamp"""
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='seconds')
+    match = _TIMESTAMP_RE.search(str(value))
+    if match:
+        return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat(timespec='seconds')
+    return datetime.fromisoformat(str(value)).isoformat(timespec='seconds')
+
+
+def _weighted_histogram(points: Iterable[Tuple[float, float, float]], height: int, width: int) -> np.ndarray:
+    """Histogram of (x, y, weight) points already in reference coordinates"""
+    hist = np.zeros(height * width, dtype=np.float64)
+    pts = np.asarray(list(points), dtype=np.float64).reshape(-1, 3)
+    xs, ys = pts[:, 0].astype(np.int64), pts[:, 1].astype(np.int64)
+    keep = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    np.add.at(hist, ys[keep] * width + xs[keep], pts[keep, 2])
+    return hist.reshape(height, width).astype(np.float32)
+
+
+class SessionStore:
+    """SQLite index + heatmap blobs for many tracked sessions"""
+    
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def close(self):
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    # Writing
+    
+    def add_session(self, heatmaps: Dict[str, np.ndarray], started_at, map_name: str = DEFAULT_MAP,
+                    source: Optional[str] = None, duration: Optional[float] = None,
+                    fps: Optional[float] = None, metadata: Optional[Dict] = None) -> int:
+        """
+        Store one session's per-channel heatmaps (reference coordinates)
+        Re-adding the same source replaces the earlier copy
+        """
+        shapes = {h.shape for h in heatmaps.values()}
+        if len(shapes) != 1:
+            raise ValueError(f"Heatmaps must share one shape, got {sorted(shapes)}")
+        height, width = shapes.pop()
+        
+        with self.conn:
+            if source is not None:
+                self.conn.execute("DELETE FROM sessions WHERE source = ?", (source,))
+            cur = self.conn.execute(
+                "INSERT INTO sessions (source, started_at, map, duration, fps, height, width, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, _timestamp(started_at), map_name, duration, fps, height, width,
+                 json.dumps(metadata or {})))
+            session_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO heatmaps (session_id, channel, total, data) VALUES (?, ?, ?, ?)",
+                [(session_id, channel, float(hist.sum()), encode_heatmap(hist))
+                 for channel, hist in heatmaps.items()])
+        
+        return session_id
+    
+    def ingest_json(self, path, map_name: str = DEFAULT_MAP, reference_size: Optional[Tuple[int, int]] = None,
+                    capture_size: Optional[Tuple[int, int]] = None) -> int:
+        """
+        Add a tracking_data_*.json file
+        Player positions are projected with the capture/reference sizes from
+        the file's metadata (or the arguments, for files written before they
+        were recorded). Creep camps and objective zones are already in
+        reference coordinates and are weighted by their uptime
+        """
+        path = Path(path)
+        with open(path) as f:
+            data = json.load(f)
+        meta = data.get('metadata', {})
+        
+        reference_size = tuple(meta.get('reference_size') or reference_size or ())
+        capture_size = tuple(meta.get('capture_size') or capture_size or reference_size)
+        if len(reference_size) != 2:
+            raise ValueError(f"{path}: no reference_size in metadata, pass it explicitly")
+        height, width = reference_size
+        
+        players = HeatmapAccumulator(reference_size, capture_size)
+        for team in ('orange', 'purple'):
+            players.add(team, [(p['x'], p['y']) for p in data.get(f'{team}_team', [])])
+        
+        heatmaps = {
+            'orange': players.channel('orange'),
+            'purple': players.channel('purple'),
+            'creep': _weighted_histogram(((c['position'][0], c['position'][1], c['uptime_seconds'])
+                                          for c in data.get('creep_camps', {}).values()), height, width),
+            'objective': _weighted_histogram(((z['position'][0], z['position'][1], z['uptime_seconds'])
+                                              for z in data.get('objective_zones', {}).values()), height, width)
+        }
+        
+        started_at = meta.get('started_at') or path.stem
+        return self.add_session(heatmaps, started_at, map_name=map_name, source=str(path.resolve()),
+                                duration=meta.get('duration'), fps=meta.get('fps'),
+                                metadata={'capture_size': list(capture_size), 'detections': meta.get('detections')})
+    
+    def delete(self, session_id: int):
+        with self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+    
+    # Querying
+    
+    def _where(self, map_name=None, since=None, until=None) -> Tuple[str, list]:
+        clauses, params = [], []
+        if map_name is not None:
+            clauses.append("map = ?")
+            params.append(map_name)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+    
+    def sessions(self, map_name: Optional[str] = None, since=None, until=None,
+                 last: Optional[int] = None) -> List[Dict]:
+        """Matching sessions, newest first"""
+        where, params = self._where(map_name, since, until)
+        sql = f"SELECT * FROM sessions{where} ORDER BY started_at DESC, id DESC"
+        if last is not None:
+            sql += " LIMIT ?"
+            params.append(int(last))
+        
+        rows = []
+        for row in self.conn.execute(sql, params):
+            row = dict(row)
+            row['metadata'] = json.loads(row['metadata'] or '{}')
+            rows.append(row)
+        return rows
+    
+    def heatmap(self, channel: str, map_name: Optional[str] = None, since=None, until=None,
+                last: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """
+        Sum of one channel over the matching sessions
+        Returns (heatmap, number of sessions summed)
+        """
+        if channel not in CHANNELS:
+            raise ValueError(f"Unknown channel {channel!r}, expected one of {CHANNELS}")
+        
+        where, params = self._where(map_name, since, until)
+        sql = (f"SELECT h.data, s.height, s.width FROM heatmaps h JOIN "
+               f"(SELECT id, height, width, started_at FROM sessions{where} "
+               f"ORDER BY started_at DESC, id DESC{' LIMIT ?' if last is not None else ''}) s "
+               f"ON h.session_id = s.id WHERE h.channel = ?")
+        if last is not None:
+            params.append(int(last))
+        params.append(channel)
+        
+        total = None
+        count = 0
+        for data, height, width in self.conn.execute(sql, params):
+            hist = decode_heatmap(data, height, width)
+            if total is None:
+                total = hist.astype(np.float64)
+            elif total.shape != hist.shape:
+                raise ValueError(f"Sessions have different map sizes: {total.shape} vs {hist.shape}, "
+                                 "filter by map_name")
+            else:
+                total += hist
+            count += 1
+        
+        if total is None:
+            return np.zeros((0, 0), dtype=np.float32), 0
+        return total.astype(np.float32), count
+    
+    def heatmaps(self, channels: Iterable[str] = CHANNELS, **filters) -> Dict[str, np.ndarray]:
+        """heatmap() for several channels with the same filters"""
+        return {channel: self.heatmap(channel, **filters)[0] for channel in channels}
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Multi-session heatmap store")
+    parser.add_argument('--db', default=str(DEFAULT_DB), help="SQLite file")
+    sub = parser.add_subparsers(dest='command', required=True)
+    
+    ingest = sub.add_parser('ingest', help="add tracking_data_*.json files")
+    ingest.add_argument('files', nargs='+')
+    ingest.add_argument('--map', default=DEFAULT_MAP)
+    ingest.add_argument('--reference-size', type=int, nargs=2, metavar=('H', 'W'),
+                        help="for files without reference_size in their metadata")
+    ingest.add_argument('--capture-size', type=int, nargs=2, metavar=('H', 'W'),
+                        help="for files without capture_size in their metadata")
+    
+    for name in ('list', 'query'):
+        p = sub.add_parser(name)
+        if name == 'query':
+            p.add_argument('channel', choices=CHANNELS)
+            p.add_argument('--out', help="save the summed heatmap (.npy)")
+        p.add_argument('--map', default=None)
+        p.add_argument('--since', help="ISO date/time")
+        p.add_argument('--until', help="ISO date/time")
+        p.add_argument('--last', type=int, help="only the N most recent sessions")
+    
+    args = parser.parse_args()
+    
+    with SessionStore(args.db) as store:
+        if args.command == 'ingest':
+            for f in args.files:
+                try:
+                    sid = store.ingest_json(f, map_name=args.map, reference_size=args.reference_size,
+                                            capture_size=args.capture_size)
+                    print(f"✅ {f} -> session {sid}")
+                except (ValueError, KeyError, json.JSONDecodeError) as e:
+                    print(f"❌ {f}: {e}")
+        
+        elif args.command == 'list':
+            for s in store.sessions(args.map, args.since, args.until, args.last):
+                print(f"{s['id']:5d}  {s['started_at']}  {s['map']}  {s['width']}x{s['height']}  "
+                      f"{s['duration'] or 0:.0f}s  {s['source']}")
+        
+        else:
+            hist, count = store.heatmap(args.channel, args.map, args.since, args.until, args.last)
+            print(f"✅ {args.channel}: {count} sessions, {hist.sum():.0f} detections")
+            if args.out:
+                np.save(args.out, hist)
+                print(f"💾 {args.out}")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+IncrementalDetector vs full-pass detection
+- Gradual changes (each step below DIFF_THRESHOLD) must still refresh tiles
+- Static frames must keep returning the full-pass result
+
+Usage:
+    python -m pytest -q test_incremental_detector.py
+"""
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from creep_objective_detector_final_v2 import (IncrementalDetector, detect_creeps, detect_objectives,
+                                               DIFF_THRESHOLD)
+
+FIXTURE = Path(__file__).resolve().parent / 'minimap_final.png'
+FADE_CAMPS = 4
+FADE_STEPS = 16
+STATIC_FRAMES = 50
+
+
+def positions(detections):
+    return sorted(tuple(d['position']) for d in detections)
+
+
+def faded_frames():
+    """Fixture with FADE_CAMPS creep camps inpainted away over FADE_STEPS frames"""
+    img = cv2.imread(str(FIXTURE))
+    assert img is not None, f"Missing fixture: {FIXTURE}"
+    
+    mask = np.zeros(img.shape[:2], np.uint8)
+    for creep in detect_creeps(img)[:FADE_CAMPS]:
+        cv2.circle(mask, tuple(creep['position']), creep.get('radius', 3) + 4, 255, -1)
+    target = cv2.inpaint(img, mask, 5, cv2.INPAINT_TELEA)
+    
+    frames = [cv2.addWeighted(img, 1 - t / FADE_STEPS, target, t / FADE_STEPS, 0)
+              for t in range(FADE_STEPS + 1)]
+    return img, target, frames
+
+
+def test_fade_steps_stay_below_threshold():
+    _, _, frames = faded_frames()
+    steps = [int(cv2.absdiff(a, b).max()) for a, b in zip(frames, frames[1:])]
+    assert max(steps) <= DIFF_THRESHOLD
+
+
+def test_gradual_fade_refreshes_tiles():
+    img, target, frames = faded_frames()
+    removed = set(positions(detect_creeps(img))) - set(positions(detect_creeps(target)))
+    assert len(removed) == FADE_CAMPS
+    
+    # No periodic full pass: the tile references alone must drop the faded camps
+    detector = IncrementalDetector(full_pass_interval=1000)
+    for frame in frames + [target] * STATIC_FRAMES:
+        creeps, _ = detector.detect(frame)
+    
+    assert detector.full_passes == 1
+    assert not removed & set(positions(creeps))
+
+
+def test_gradual_fade_matches_full_pass():
+    _, target, frames = faded_frames()
+    detector = IncrementalDetector()
+    for frame in frames + [target] * STATIC_FRAMES:
+        creeps, objectives = detector.detect(frame)
+    
+    assert positions(creeps) == positions(detect_creeps(target))
+    assert positions(objectives) == positions(detect_objectives(target))
+
+
+def test_static_frames_reuse_detections():
+    img = cv2.imread(str(FIXTURE))
+    detector = IncrementalDetector(full_pass_interval=1000)
+    for _ in range(10):
+        creeps, _ = detector.detect(img)
+    
+    assert detector.full_passes == 1
+    assert positions(creeps) == positions(detect_creeps(img))
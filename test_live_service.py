@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+LiveService shutdown with a subscriber that stopped reading
+- stop() must return even while a snapshot write is blocked
+- a subscriber that does not read within the send timeout is dropped
+
+Usage:
+    python -m pytest -q test_live_service.py
+"""
+
+import base64
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from live_service import LiveState, LiveService, SERVICE_HOST
+
+PAYLOAD_BYTES = 4 << 20  # far more than the socket buffers hold
+STOP_TIMEOUT = 5.0
+
+
+class BulkyState(LiveState):
+    """LiveState whose snapshots are padded to PAYLOAD_BYTES"""
+    
+    def snapshot_json(self):
+        version, body = super().snapshot_json()
+        return version, body + b' ' * PAYLOAD_BYTES
+    
+    def bump(self):
+        with self.lock:
+            self.version += 1
+        for notify in self.listeners:
+            notify()
+
+
+def stalled_subscriber(port):
+    """WebSocket subscriber with a tiny receive buffer that never reads"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect((SERVICE_HOST, port))
+    key = base64.b64encode(os.urandom(16)).decode()
+    sock.sendall(f"GET /subscribe HTTP/1.1\r\nHost: {SERVICE_HOST}:{port}\r\nUpgrade: websocket\r\n"
+                 f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+    return sock
+
+
+def wait_for(condition, timeout=STOP_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def start(send_timeout=None):
+    state = BulkyState(np.zeros((40, 40, 3), np.uint8))
+    kwargs = {} if send_timeout is None else {'send_timeout': send_timeout}
+    return state, LiveService(state, port=0, **kwargs).start()
+
+
+def test_stop_with_stalled_subscriber():
+    state, service = start()
+    sock = stalled_subscriber(service.port)
+    try:
+        assert wait_for(lambda: service.subscribers == 1)
+        state.bump()
+        time.sleep(0.5)  # let the write fill the buffers and block in drain()
+        
+        stopper = threading.Thread(target=service.stop, daemon=True)
+        stopper.start()
+        stopper.join(STOP_TIMEOUT)
+        assert not stopper.is_alive()
+    finally:
+        sock.close()
+
+
+def test_stalled_subscriber_is_dropped():
+    state, service = start(send_timeout=0.5)
+    sock = stalled_subscriber(service.port)
+    try:
+        assert wait_for(lambda: service.subscribers == 1)
+        state.bump()
+        assert wait_for(lambda: service.subscribers == 0)
+    finally:
+        sock.close()
+        service.stop()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+MarkerTracker vs plain per-frame detection
+- Window searches must replace most full searches on a moving sequence,
+  and tracking must cost less than detect_pokemon_markers on every frame
+- Markers that jump out of their windows are recovered by one full search
+
+Usage:
+    python -m pytest -q test_marker_tracker.py
+"""
+
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from marker_tracker import MarkerTracker, FULL_SEARCH_INTERVAL, TRACK_LOST_FRAMES
+from pokemon_detector import detect_pokemon_markers
+
+FIXTURE = Path(__file__).resolve().parent / 'minimap_final.png'
+FRAMES = 120
+PAD = 60
+JUMP_FRAME = 10
+JUMP = 40  # px, well outside a track's search window
+POSITION_TOLERANCE = 2  # px; a window search can land a pixel or two off the full search
+
+
+def shifted(offsets):
+    """minimap_final.png panned by (dx, dy) per frame (markers move with it)"""
+    img = cv2.imread(str(FIXTURE))
+    assert img is not None, f"Missing fixture: {FIXTURE}"
+    height, width = img.shape[:2]
+    padded = cv2.copyMakeBorder(img, PAD, PAD, PAD, PAD, cv2.BORDER_REFLECT)
+    return [np.ascontiguousarray(padded[PAD + dy:PAD + dy + height, PAD + dx:PAD + dx + width])
+            for dx, dy in offsets]
+
+
+def moving_frames():
+    return shifted([(int(10 * np.sin(i / 10)), int(10 * np.cos(i / 13))) for i in range(FRAMES)])
+
+
+def positions(markers):
+    return sorted(tuple(m['position']) for m in markers)
+
+
+def same_markers(a, b):
+    a, b = positions(a), positions(b)
+    return len(a) == len(b) and all(abs(p[0] - q[0]) <= POSITION_TOLERANCE and
+                                    abs(p[1] - q[1]) <= POSITION_TOLERANCE for p, q in zip(a, b))
+
+
+def best_time(fn, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_moving_sequence_mostly_window_searches():
+    frames = moving_frames()
+    tracker = MarkerTracker()
+    same = sum(same_markers(tracker.update(idx, img), detect_pokemon_markers(img))
+               for idx, img in enumerate(frames))
+    
+    # Periodic searches plus at most a couple of recoveries
+    assert tracker.full_searches <= FRAMES // FULL_SEARCH_INTERVAL + 2
+    assert tracker.window_searches > 0
+    assert same >= 0.9 * FRAMES
+
+
+def test_tracking_costs_less_than_plain_detection():
+    frames = moving_frames()
+    
+    # Warm the detector caches before timing either path
+    detect_pokemon_markers(frames[0])
+    
+    def plain():
+        for img in frames:
+            detect_pokemon_markers(img)
+    
+    def tracked():
+        tracker = MarkerTracker()
+        for idx, img in enumerate(frames):
+            tracker.update(idx, img)
+    
+    assert best_time(tracked) < best_time(plain)
+
+
+def test_jump_recovered_by_one_full_search():
+    frames = shifted([(0, 0)] * JUMP_FRAME + [(JUMP, JUMP)] * 20)
+    tracker = MarkerTracker()
+    searches = []
+    for idx, img in enumerate(frames):
+        markers = tracker.update(idx, img)
+        searches.append(tracker.full_searches)
+    
+    assert same_markers(markers, detect_pokemon_markers(frames[-1]))
+    # One search to recover; the tracks left behind expire without more
+    assert searches[-1] - searches[JUMP_FRAME - 1] == 1
+    assert searches[JUMP_FRAME + TRACK_LOST_FRAMES - 1] == searches[-1]
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-fine minimap search vs the full-resolution search
+- Fixtures upscaled to the benchmark display sizes
+- Every pyramid level must return the same box as pyramid_levels=0
+
+Usage:
+    python -m pytest -q test_minimap_pyramid.py
+"""
+
+from pathlib import Path
+
+import cv2
+import pytest
+
+from minimap_detector_final import auto_detect_minimap_final
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+FIXTURES = ['sample.png', 'screenshot_exact_minimap.png']
+
+# Same display sizes as benchmark.py
+RESOLUTIONS = {'1080p': (1920, 1080), '1440p': (2560, 1440), '4k': (3840, 2160)}
+PYRAMID_LEVELS = (1, 2)
+
+
+@pytest.fixture(scope='module', params=[(name, res) for name in FIXTURES for res in RESOLUTIONS],
+                ids=lambda p: f'{p[0]}-{p[1]}')
+def upscaled(request):
+    name, res = request.param
+    img = cv2.imread(str(FIXTURE_DIR / name))
+    assert img is not None, f"Missing fixture: {name}"
+    return cv2.resize(img, RESOLUTIONS[res], interpolation=cv2.INTER_LINEAR)
+
+
+@pytest.mark.parametrize('levels', PYRAMID_LEVELS)
+def test_pyramid_matches_full_search(upscaled, levels):
+    # None included: the pyramid must not find a box the full search misses
+    full = auto_detect_minimap_final(upscaled)
+    assert auto_detect_minimap_final(upscaled, pyramid_levels=levels) == full
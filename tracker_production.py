@@ -6,6 +6,10 @@ Pokemon Unite Tracker - PRODUCTION VERSION
 - 3.5x radius clustering for creeps
 - Green timestamps for creeps, yellow for objectives
 - Proper scaling for heatmap overlay
+- Optional reference-scale detection (--normalize)
+- Optional incremental creep/objective detection (--incremental)
+- Optional marker tracking with per-player trajectories (--track)
+- Optional batched detection over stacks of frames (--batch)
 """
 
 import cv2
@@ -14,6 +18,8 @@ import json
 import time
 import signal
 import sys
+import threading
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
@@ -29,6 +35,23 @@ ORANGE_COLOR = (0, 154, 255)  # BGR
 PURPLE_COLOR = (255, 76, 175)
 CAPTURE_DURATION = 600
 CAPTURE_FPS = 1
+MINIMAP_REDETECT_INTERVAL = 300  # frames between forced full minimap detections
+MINIMAP_RETRY_DELAY = 0.5  # seconds before retrying a failed full-screen detection (doubles per miss)
+MINIMAP_RETRY_MAX_DELAY = 8.0
+MINIMAP_RESCALE_TOLERANCE = 0.25  # crops within this fraction of the capture size are rescaled, others skipped
+SAVE_DETECTIONS = True  # per-frame detections to outputs/detections_TIMESTAMP/
+PROCESS_WORKERS = 1  # >1 processes frames on a worker pool
+LIVE_WORKERS = 2  # detector threads in --live mode
+LIVE_QUEUE_SIZE = 4  # frames buffered between capture and detectors
+LIVE_OVERLOAD_POLICY = 'drop_oldest'  # drop_oldest / drop_newest / block
+LIVE_PREVIEW_HZ = 0  # >0 rewrites outputs/heatmap_live.png this often (per second) in live mode
+SERVE_LIVE_STATE = False  # serve live state to dashboards on 127.0.0.1 (live_service.py)
+NORMALIZE_TO_REFERENCE = False  # detect at the canonical scale, coordinates in reference-map space
+INCREMENTAL_DETECTION = False  # re-detect creeps/objectives only where the minimap changed
+TRACK_MARKERS = False  # follow markers frame to frame (track ids, per-player trajectories)
+BATCH_FRAMES = 1  # >1 runs the detectors over stacks of this many same-size crops
+SESSION_STORE = True  # add every session's heatmaps to outputs/sessions.db for cross-match queries
+HEATMAP_CUBE = True  # save a cumulative time-binned heatmap cube (time-window heatmaps by subtraction)
 
 OBJECTIVE_ZONES = [
     {'name': 'top', 'region': (0.35, 0.05, 0.65, 0.25)},
@@ -37,9 +60,19 @@ OBJECTIVE_ZONES = [
 ]
 
 # Import detectors
-from pokemon_detector import detect_pokemon_markers
-from creep_objective_detector_final_v2 import detect_creeps, detect_objectives, cluster_positions
-from minimap_detector_final import auto_detect_minimap_final
+from frame_context import analyze_frame, analyze_batch
+from creep_objective_detector_final_v2 import OnlineClusterer, IncrementalDetector
+from minimap_detector_final import MinimapLocator
+from video_source import VideoSource
+from parallel_processor import ParallelFrameProcessor
+from live_pipeline import LivePipeline, POLICIES
+from heatmap_accumulator import HeatmapAccumulator, HeatmapCube
+from heatmap_renderer import HeatmapRenderer, format_uptime
+from marker_tracker import MarkerTracker
+from detection_store import DetectionWriter
+from session_store import SessionStore
+from live_service import LiveState, LiveService, SERVICE_PORT
+import instrumentation
 
 should_stop = False
 
@@ -62,8 +95,117 @@ def assign_objective_to_zone(position, minimap_width, minimap_height):
     return None
 
 
+class SessionResults:
+    """
+    Detections folded in frame by frame
+    fps is the sample rate (each detection stands for 1/fps seconds);
+    timestamps maps frame_idx -> seconds into the source when known (the
+    detection store keeps them as [frame_idx, seconds] pairs)
+    """
+    
+    def __init__(self, reference_size, store=None, fps=CAPTURE_FPS, timestamps=None):
+        self.reference_size = reference_size
+        self.store = store
+        self.fps = fps
+        self.timestamps = timestamps if timestamps is not None else {}
+        self.frames = 0
+        self.purple_pos = []
+        self.orange_pos = []
+        self.creep_det = OnlineClusterer()
+        self.obj_det = []
+        self.heatmaps = None
+        self.cube = None
+        self.tracks = {}
+    
+    def add(self, idx, capture_size, result):
+        minimap_height, minimap_width = capture_size
+        self.frames += 1
+        
+        # Heatmaps accumulate in reference-map coordinates as frames arrive
+        if self.heatmaps is None:
+            self.heatmaps = HeatmapAccumulator(self.reference_size, capture_size)
+            if HEATMAP_CUBE:
+                self.cube = HeatmapCube(self.reference_size, capture_size)
+        
+        # Players
+        for m in result['markers']:
+            pos = m['position']
+            if m['team'] == 'orange':
+                self.orange_pos.append({'x': pos[0], 'y': pos[1]})
+            else:
+                self.purple_pos.append({'x': pos[0], 'y': pos[1]})
+            
+            # Per-player trajectories when markers are tracked
+            if 'track_id' in m:
+                self.tracks.setdefault(m['track_id'], []).append((idx, pos[0], pos[1], m['team']))
+        
+        # Creeps (exclude objective zones), clustered as they arrive
+        creeps = [
+            {'position': c['position'], 'radius': c.get('radius', 3)}
+            for c in result['creeps']
+            if assign_objective_to_zone(c['position'], minimap_width, minimap_height) is None
+        ]
+        self.creep_det.add(idx, creeps)
+        
+        # Objectives (only in zones)
+        objectives = []
+        for obj in result['objectives']:
+            pos = obj['position']
+            zone = assign_objective_to_zone(pos, minimap_width, minimap_height)
+            if zone:
+                objectives.append({'position': pos, 'zone': zone, 'frame': idx})
+        self.obj_det.extend(objectives)
+        
+        self.heatmaps.add_frame(result['markers'], creeps, objectives)
+        if self.cube is not None:
+            self.cube.add_frame(idx, result['markers'], creeps, objectives)
+        
+        # Raw per-frame detections go to the columnar store
+        if self.store is not None:
+            self.store.append(idx, result['markers'], result['creeps'], result['objectives'])
+    
+    def seconds(self, count):
+        """Frame count -> seconds at the sample rate"""
+        return count / self.fps
+    
+    @property
+    def duration(self):
+        """Seconds of processed frames"""
+        return self.seconds(self.frames)
+    
+    @property
+    def start_offset(self):
+        """Timestamp of the first sample (seconds into the source)"""
+        return min(self.timestamps.values()) if self.timestamps else 0.0
+    
+    def close(self):
+        if self.store is not None:
+            self.store.metadata['start_offset'] = self.start_offset
+            if self.timestamps:
+                self.store.metadata['timestamps'] = [[idx, round(self.timestamps[idx], 3)]
+                                                     for idx in sorted(self.timestamps)]
+            self.store.close()
+    
+    def report(self):
+        print(f"\n✅ Purple: {len(self.purple_pos)}, Orange: {len(self.orange_pos)}")
+        print(f"   Creeps: {self.creep_det.total_detections}, Objectives: {len(self.obj_det)}")
+    
+    def trajectories(self):
+        """{track_id: {'team', 'points': [[frame, x, y]]}}, team by majority vote"""
+        out = {}
+        for tid, points in self.tracks.items():
+            teams = [p[3] for p in points]
+            out[str(tid)] = {'team': max(set(teams), key=teams.count),
+                             'points': [[int(f), int(x), int(y)] for f, x, y, _ in points]}
+        return out
+    
+    def as_tuple(self):
+        return self.purple_pos, self.orange_pos, self.creep_det, self.obj_det
+
+
 class Tracker:
-    def __init__(self):
+    def __init__(self, normalize=NORMALIZE_TO_REFERENCE, incremental=INCREMENTAL_DETECTION,
+                 track=TRACK_MARKERS, batch=BATCH_FRAMES):
         self.output_dir = Path("outputs")
         self.tmp_dir = Path("tmp")
         self.output_dir.mkdir(exist_ok=True)
@@ -87,23 +229,44 @@ class Tracker:
             sys.exit(1)
         
         self.minimap_region = None
+        self.locator = MinimapLocator(redetect_interval=MINIMAP_REDETECT_INTERVAL)
         self.screenshots_captured = 0
+        self.capture_size = None
+        self.frames_skipped = 0
+        self.retry_delay = 0.0
+        self.retry_at = 0.0
         self.start_time = None
+        
+        # Reference-scale mode: detectors return reference-map coordinates
+        self.detection_reference_size = self.reference_map.shape[:2] if normalize else None
+        self.incremental = incremental
+        self.track = track
+        self.batch = batch
+        
+        # Dashboards read live state from here when the service is running
+        self.live_state = None
+        self.service = None
+    
+    def start_service(self, port=SERVICE_PORT):
+        self.live_state = LiveState(self.reference_map, layers=(('orange', ORANGE_COLOR), ('purple', PURPLE_COLOR)))
+        self.service = LiveService(self.live_state, port=port).start()
+        print(f"📡 Live state on http://{self.service.host}:{self.service.port}/ (/state, /heatmap.png, /subscribe)")
     
-    def capture_screen(self):
+    def stop_service(self):
+        if self.service is not None:
+            self.service.stop()
+            self.service = None
+    
+    def capture_screen(self, bbox=None):
         try:
-            screenshot = ImageGrab.grab()
+            screenshot = ImageGrab.grab(bbox=bbox)
             screen = np.array(screenshot)
             return cv2.cvtColor(screen, cv2.COLOR_RGB2BGR)
         except:
             return None
     
-    def phase1_capture(self):
-        global should_stop
-        print("\n" + "=" * 70)
-        print("📸 PHASE 1: CAPTURE")
-        print("=" * 70)
-        
+    def wait_for_minimap(self):
+        """Block until the minimap is found on screen (False if stopped)"""
         print("🔍 Waiting for minimap...")
         while not should_stop:
             screen = self.capture_screen()
@@ -111,7 +274,7 @@ class Tracker:
                 time.sleep(0.5)
                 continue
             
-            region = auto_detect_minimap_final(screen)
+            region = self.locator.detect(screen)
             if region:
                 self.minimap_region = region
                 x1, y1, x2, y2 = region
@@ -122,10 +285,73 @@ class Tracker:
                 
                 minimap = screen[y1:y2, x1:x2]
                 cv2.imwrite(str(self.output_dir / "minimap_preview.png"), minimap)
-                break
+                return True
             time.sleep(0.5)
+        return False
+    
+    def grab_minimap(self):
+        """
+        Grab only the minimap; full screen only when the box needs re-detection
+        Returns None (skip the frame) when the crop fails validation and
+        re-detection fails too; full-screen retries then back off
+        """
+        minimap = self.capture_screen(bbox=self.minimap_region)
+        if minimap is None or not self.minimap_region:
+            return None
+        
+        if not self.locator.check(minimap):
+            if time.time() < self.retry_at:
+                self.frames_skipped += 1
+                return None
+            
+            screen = self.capture_screen()
+            if screen is None or not self.locator.detect(screen):
+                self.retry_delay = min(self.retry_delay * 2 or MINIMAP_RETRY_DELAY, MINIMAP_RETRY_MAX_DELAY)
+                self.retry_at = time.time() + self.retry_delay
+                self.frames_skipped += 1
+                return None
+            
+            self.retry_delay = 0.0
+            self.minimap_region = self.locator.box
+            x1, y1, x2, y2 = self.minimap_region
+            minimap = screen[y1:y2, x1:x2]
+        
+        return self.fit_capture_size(minimap)
+    
+    def fit_capture_size(self, minimap):
+        """
+        Keep every crop at the session's capture size
+        A re-detected box is usually a few px off and gets rescaled; one that
+        differs by more than MINIMAP_RESCALE_TOLERANCE is skipped (None)
+        """
+        # Reference-scale detection rescales every crop itself
+        if self.detection_reference_size is not None:
+            return minimap
+        
+        height, width = minimap.shape[:2]
+        if self.capture_size is None:
+            self.capture_size = (height, width)
+            return minimap
+        
+        capture_h, capture_w = self.capture_size
+        if (height, width) == (capture_h, capture_w):
+            return minimap
+        
+        if (abs(height / capture_h - 1) > MINIMAP_RESCALE_TOLERANCE
+                or abs(width / capture_w - 1) > MINIMAP_RESCALE_TOLERANCE):
+            self.frames_skipped += 1
+            return None
+        
+        interpolation = cv2.INTER_AREA if height * width > capture_h * capture_w else cv2.INTER_LINEAR
+        return cv2.resize(minimap, (capture_w, capture_h), interpolation=interpolation)
+    
+    def phase1_capture(self):
+        global should_stop
+        print("\n" + "=" * 70)
+        print("📸 PHASE 1: CAPTURE")
+        print("=" * 70)
         
-        if should_stop:
+        if not self.wait_for_minimap():
             return
         
         print(f"\n⏱️  Capturing for {CAPTURE_DURATION}s...")
@@ -135,11 +361,8 @@ class Tracker:
         while not should_stop and self.screenshots_captured < CAPTURE_DURATION * CAPTURE_FPS:
             frame_start = time.time()
             
-            screen = self.capture_screen()
-            if screen is not None and self.minimap_region:
-                x1, y1, x2, y2 = self.minimap_region
-                minimap = screen[y1:y2, x1:x2]
-                
+            minimap = self.grab_minimap()
+            if minimap is not None:
                 path = self.tmp_dir / f"screenshot_{self.screenshots_captured:04d}.png"
                 cv2.imwrite(str(path), minimap)
                 self.screenshots_captured += 1
@@ -151,73 +374,97 @@ class Tracker:
             if elapsed < frame_interval:
                 time.sleep(frame_interval - elapsed)
         
-        print(f"\n✅ Captured {self.screenshots_captured} frames")
+        print(f"\n✅ Captured {self.screenshots_captured} frames, skipped {self.frames_skipped} without a minimap")
     
-    def phase2_process(self):
+    def phase2_process(self, workers=PROCESS_WORKERS):
         print("\n" + "=" * 70)
         print("📄 PHASE 2: PROCESS")
         print("=" * 70)
         
-        purple_pos = []
-        orange_pos = []
-        creep_det = []
-        obj_det = []
-        
         files = sorted(self.tmp_dir.glob("screenshot_*.png"))
         total = len(files)
         
         if total == 0:
             print("❌ No screenshots!")
-            return None, None, None, None
-        
-        first_img = cv2.imread(str(files[0]))
-        minimap_height, minimap_width = first_img.shape[:2]
+            return None
         
-        for idx, f in enumerate(files):
-            img = cv2.imread(str(f))
-            if img is None:
-                continue
-            
-            # Players
-            markers, _, _ = detect_pokemon_markers(img)
-            for m in markers:
-                pos = m['position']
-                if m['team'] == 'orange':
-                    orange_pos.append({'x': pos[0], 'y': pos[1]})
-                else:
-                    purple_pos.append({'x': pos[0], 'y': pos[1]})
-            
-            # Creeps (exclude objective zones)
-            creeps = detect_creeps(img)
-            for c in creeps:
-                pos = c['position']
-                zone = assign_objective_to_zone(pos, minimap_width, minimap_height)
-                if zone is None:
-                    creep_det.append({
-                        'position': pos, 
-                        'frame': idx,
-                        'radius': c.get('radius', 3)
-                    })
-            
-            # Objectives (only in zones)
-            objectives = detect_objectives(img)
-            for obj in objectives:
-                pos = obj['position']
-                zone = assign_objective_to_zone(pos, minimap_width, minimap_height)
-                if zone:
-                    obj_det.append({'position': pos, 'zone': zone, 'frame': idx})
+        frames = ((idx, cv2.imread(str(f))) for idx, f in enumerate(files))
+        return self.process_frames(frames, total, workers=workers)
+    
+    def process_frames(self, frames, total=None, workers=PROCESS_WORKERS, fps=CAPTURE_FPS, timestamps=None):
+        """
+        Run the detectors over (frame_idx, minimap) pairs
+        fps/timestamps describe the samples (see SessionResults)
+        """
+        session = self.new_session(fps, timestamps)
+        
+        # One HSV/gray/mask computation shared by all detectors
+        if workers > 1:
+            if self.incremental or self.track:
+                print("⚠️  Incremental detection and tracking need frames in order, running full passes on the pool")
+            analyzed = ParallelFrameProcessor(workers=workers,
+                                              reference_size=self.detection_reference_size).map(frames)
+        elif self.batch > 1 and not (self.incremental or self.track):
+            analyzed = self.analyze_batches(frames)
+        else:
+            # Frame differencing and tracking only work on one in-order stream
+            incremental = IncrementalDetector() if self.incremental else None
+            marker_tracker = MarkerTracker() if self.track else None
+            analyzed = ((idx, img.shape[:2],
+                         analyze_frame(img, idx, reference_size=self.detection_reference_size,
+                                       incremental=incremental, marker_tracker=marker_tracker))
+                        for idx, img in frames if img is not None)
+        
+        for idx, shape, result in analyzed:
+            # First frame fixes the capture size used for zones and scaling
+            # (the reference size itself in reference-scale mode)
+            if self.capture_size is None:
+                self.capture_size = result['frame_size']
+            session.add(idx, self.capture_size, result)
+            if self.live_state is not None:
+                self.live_state.publish(idx, result, session, {'processed': session.heatmaps.frames})
             
             if (idx + 1) % 50 == 0:
-                print(f"   {idx + 1}/{total}")
+                print(f"   {idx + 1}/{total or '?'}")
         
-        print(f"\n✅ Purple: {len(purple_pos)}, Orange: {len(orange_pos)}")
-        print(f"   Creeps: {len(creep_det)}, Objectives: {len(obj_det)}")
+        session.report()
+        return session
+    
+    def analyze_batches(self, frames):
+        """Detect over stacks of up to self.batch consecutive same-size crops"""
+        chunk = []
+        
+        def flush():
+            results = analyze_batch([img for _, img in chunk], [idx for idx, _ in chunk],
+                                    reference_size=self.detection_reference_size)
+            for (idx, img), result in zip(chunk, results):
+                yield idx, img.shape[:2], result
+            chunk.clear()
+        
+        for idx, img in frames:
+            if img is None:
+                continue
+            # A re-detected minimap box can change the crop size mid-stream
+            if chunk and (len(chunk) >= self.batch or chunk[0][1].shape != img.shape):
+                yield from flush()
+            chunk.append((idx, img))
         
-        return purple_pos, orange_pos, creep_det, obj_det
+        if chunk:
+            yield from flush()
+    
+    def new_session(self, fps=CAPTURE_FPS, timestamps=None):
+        store = None
+        if SAVE_DETECTIONS:
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            store = DetectionWriter(self.output_dir / f"detections_{ts}",
+                                    metadata={'fps': fps})
+        return SessionResults(self.reference_map.shape[:2], store=store, fps=fps, timestamps=timestamps)
     
-    def phase3_generate(self, purple_pos, orange_pos, creep_det, obj_det):
-        if purple_pos is None:
+    def phase3_generate(self, session):
+        if session is None:
             return
+        session.close()
+        purple_pos, orange_pos, creep_det, obj_det = session.as_tuple()
         
         print("\n" + "=" * 70)
         print("🎨 PHASE 3: GENERATE")
@@ -227,10 +474,8 @@ class Tracker:
         height, width = base.shape[:2]
         
         # Scaling
-        files = sorted(self.tmp_dir.glob("screenshot_*.png"))
-        if files:
-            sample = cv2.imread(str(files[0]))
-            capture_h, capture_w = sample.shape[:2]
+        if self.capture_size is not None:
+            capture_h, capture_w = self.capture_size
             scale_x = width / capture_w
             scale_y = height / capture_h
             
@@ -240,94 +485,38 @@ class Tracker:
         else:
             scale_x = scale_y = 1.0
         
-        # Heatmaps
-        hmap_o = np.zeros((height, width), dtype=np.float32)
-        hmap_p = np.zeros((height, width), dtype=np.float32)
-        
-        for pos in orange_pos:
-            x, y = int(pos['x'] * scale_x), int(pos['y'] * scale_y)
-            if 0 <= x < width and 0 <= y < height:
-                hmap_o[y, x] += 1
-        
-        for pos in purple_pos:
-            x, y = int(pos['x'] * scale_x), int(pos['y'] * scale_y)
-            if 0 <= x < width and 0 <= y < height:
-                hmap_p[y, x] += 1
-        
-        # Blur
-        if hmap_o.max() > 0:
-            hmap_o = cv2.GaussianBlur(hmap_o, (25, 25), 0)
-            hmap_o = hmap_o / hmap_o.max()
-        
-        if hmap_p.max() > 0:
-            hmap_p = cv2.GaussianBlur(hmap_p, (25, 25), 0)
-            hmap_p = hmap_p / hmap_p.max()
-        
-        # Apply
-        overlay = base.copy().astype(np.float32)
-        for y in range(height):
-            for x in range(width):
-                if hmap_o[y, x] > 0:
-                    intensity = 0.01 + hmap_o[y, x] * 0.99
-                    alpha = min(intensity * 0.6, 0.8)
-                    overlay[y, x] = overlay[y, x] * (1 - alpha) + np.array(ORANGE_COLOR) * alpha
-                if hmap_p[y, x] > 0:
-                    intensity = 0.01 + hmap_p[y, x] * 0.99
-                    alpha = min(intensity * 0.6, 0.8)
-                    overlay[y, x] = overlay[y, x] * (1 - alpha) + np.array(PURPLE_COLOR) * alpha
-        
-        final = overlay.astype(np.uint8)
-        
-        # Creeps with 3.5x clustering
-        creep_camps = cluster_positions(creep_det)
-        for camp_id, dets in creep_camps.items():
-            if not dets:
-                continue
-            avg_x = int(np.mean([d['position'][0] for d in dets]) * scale_x)
-            avg_y = int(np.mean([d['position'][1] for d in dets]) * scale_y)
-            if avg_x < 10 or avg_y < 10 or avg_x >= width - 10 or avg_y >= height - 10:
-                continue
-            uptime_s = len(dets)
-            mins = uptime_s // 60
-            secs = uptime_s % 60
-            txt = f"{mins:02d}:{secs:02d}"
-            
-            # Yellow dot, GREEN text
-            cv2.circle(final, (avg_x, avg_y), 3, (0, 255, 255), -1)
-            cv2.putText(final, txt, (avg_x + 8, avg_y + 4),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1, cv2.LINE_AA)
+        # Heatmaps (already accumulated in reference coordinates)
+        renderer = HeatmapRenderer(base, layers=(('orange', ORANGE_COLOR), ('purple', PURPLE_COLOR)))
+        if session.heatmaps is not None:
+            renderer.set_layer('orange', session.heatmaps.channel('orange'))
+            renderer.set_layer('purple', session.heatmaps.channel('purple'))
+        
+        def on_map(x, y):
+            return 10 <= x < width - 10 and 10 <= y < height - 10
         
+        # Creeps with 3.5x clustering: yellow dot, GREEN text
+        creep_camps = creep_det.snapshot()
+        camp_labels = [(int(camp['position'][0] * scale_x), int(camp['position'][1] * scale_y),
+                        format_uptime(round(session.seconds(camp['count'])))) for camp in creep_camps.values()]
+        renderer.set_annotations('creep', [c for c in camp_labels if on_map(c[0], c[1])], (0, 255, 0))
         print(f"   {len(creep_camps)} creep camps (3.5x clustering)")
         
-        # Objectives
+        # Objectives: yellow dot, YELLOW text
         obj_zones = {}
         for det in obj_det:
-            zone = det['zone']
-            if zone not in obj_zones:
-                obj_zones[zone] = []
-            obj_zones[zone].append(det)
+            obj_zones.setdefault(det['zone'], []).append(det)
         
-        for zone_name, dets in obj_zones.items():
-            if not dets:
-                continue
-            avg_x = int(np.mean([d['position'][0] for d in dets]) * scale_x)
-            avg_y = int(np.mean([d['position'][1] for d in dets]) * scale_y)
-            if avg_x < 10 or avg_y < 10 or avg_x >= width - 10 or avg_y >= height - 10:
-                continue
-            uptime_s = len(dets)
-            mins = uptime_s // 60
-            secs = uptime_s % 60
-            txt = f"{mins:02d}:{secs:02d}"
-            
-            # Yellow dot, YELLOW text
-            cv2.circle(final, (avg_x, avg_y), 3, (0, 255, 255), -1)
-            cv2.putText(final, txt, (avg_x + 8, avg_y + 4),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
+        zone_labels = [(int(np.mean([d['position'][0] for d in dets]) * scale_x),
+                        int(np.mean([d['position'][1] for d in dets]) * scale_y),
+                        format_uptime(round(session.seconds(len(dets))))) for dets in obj_zones.values() if dets]
+        renderer.set_annotations('objective', [z for z in zone_labels if on_map(z[0], z[1])], (0, 255, 255))
+        final = renderer.render()
         
         print(f"   {len(obj_zones)} objective zones")
         
         # Save
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        started_at = datetime.fromtimestamp(self.start_time) if self.start_time else datetime.now()
         final_path = self.output_dir / f"heatmap_final_{ts}.png"
         cv2.imwrite(str(final_path), final)
         print(f"\n✅ {final_path}")
@@ -336,34 +525,167 @@ class Tracker:
         tracking_data = {
             'purple_team': purple_pos,
             'orange_team': orange_pos,
-            'creep_camps': {str(cid): {'position': (int(np.mean([d['position'][0] for d in dets]) * scale_x),
-                                                    int(np.mean([d['position'][1] for d in dets]) * scale_y)),
-                                       'uptime_seconds': len(dets)}
-                            for cid, dets in creep_camps.items()},
+            'creep_camps': {str(cid): {'position': (int(camp['position'][0] * scale_x),
+                                                    int(camp['position'][1] * scale_y)),
+                                       'uptime_seconds': session.seconds(camp['count'])}
+                            for cid, camp in creep_camps.items()},
             'objective_zones': {zone: {'position': (int(np.mean([d['position'][0] for d in dets]) * scale_x),
                                                     int(np.mean([d['position'][1] for d in dets]) * scale_y)),
-                                       'uptime_seconds': len(dets)}
+                                       'uptime_seconds': session.seconds(len(dets))}
                                 for zone, dets in obj_zones.items()},
-            'metadata': {'duration': self.screenshots_captured, 'fps': CAPTURE_FPS}
+            'player_tracks': session.trajectories(),
+            'metadata': {'duration': session.duration, 'fps': session.fps,
+                         'start_offset': session.start_offset,
+                         'started_at': started_at.isoformat(timespec='seconds'),
+                         'capture_size': list(self.capture_size) if self.capture_size is not None else None,
+                         'reference_size': [height, width],
+                         'detections': str(session.store.path) if session.store is not None else None}
         }
         
+        if session.cube is not None:
+            cube_path = self.output_dir / f"heatmap_cube_{ts}.npz"
+            session.cube.save(cube_path)
+            tracking_data['metadata']['heatmap_cube'] = str(cube_path)
+            print(f"🧊 {cube_path} ({session.cube.num_bins} bins of {session.cube.bin_frames} frames)")
+        
         json_path = self.output_dir / f"tracking_data_{ts}.json"
         with open(json_path, 'w') as f:
             json.dump(tracking_data, f, indent=2)
         print(f"📊 {json_path}")
         
+        # Cross-match store (exact per-detection heatmaps, not the JSON summary)
+        if SESSION_STORE and session.heatmaps is not None:
+            with SessionStore(self.output_dir / "sessions.db") as sessions:
+                sid = sessions.add_session(session.heatmaps.heatmaps(), started_at,
+                                           source=str(json_path.resolve()),
+                                           duration=session.duration, fps=session.fps,
+                                           metadata=tracking_data['metadata'])
+            print(f"🗄️  Session {sid} -> {sessions.path}")
+        
         # Cleanup
         if DELETE_SCREENSHOTS:
             print("\n🗑️  Cleaning tmp/...")
             for f in self.tmp_dir.glob("*.png"):
                 f.unlink()
     
-    def run(self):
+    def run(self, workers=PROCESS_WORKERS):
         try:
             self.phase1_capture()
             if self.screenshots_captured > 0:
-                purple, orange, creeps, objs = self.phase2_process()
-                self.phase3_generate(purple, orange, creeps, objs)
+                session = self.phase2_process(workers=workers)
+                self.phase3_generate(session)
+            print("\n✅ DONE!")
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    def run_live(self, workers=LIVE_WORKERS, policy=LIVE_OVERLOAD_POLICY, preview_hz=LIVE_PREVIEW_HZ):
+        """
+        Capture and detect concurrently instead of capture-then-process
+        Frames go through a bounded queue, so memory stays flat when the
+        detectors fall behind (overflow handled by the overload policy)
+        """
+        try:
+            print("\n" + "=" * 70)
+            print("📡 LIVE CAPTURE + PROCESS")
+            print("=" * 70)
+            
+            if not self.wait_for_minimap():
+                return
+            
+            session = self.new_session()
+            self.session = session
+            lock = threading.Lock()
+            
+            # Live preview: only layers whose histogram changed are re-rendered
+            renderer = None
+            if preview_hz > 0:
+                renderer = HeatmapRenderer(self.reference_map,
+                                           layers=(('orange', ORANGE_COLOR), ('purple', PURPLE_COLOR)))
+            preview_path = self.output_dir / "heatmap_live.png"
+            last_preview = [0.0]
+            
+            def on_result(idx, minimap, result):
+                with lock:
+                    if self.capture_size is None:
+                        self.capture_size = result['frame_size']
+                    session.add(idx, self.capture_size, result)
+                    if self.live_state is not None:
+                        self.live_state.publish(idx, result, session, self.pipeline.stats.as_dict())
+                    
+                    now = time.time()
+                    if renderer is not None and now - last_preview[0] >= 1.0 / preview_hz:
+                        last_preview[0] = now
+                        renderer.set_layer('orange', session.heatmaps.channel('orange'))
+                        renderer.set_layer('purple', session.heatmaps.channel('purple'))
+                        cv2.imwrite(str(preview_path), renderer.render())
+            
+            # Frame differencing and tracking need one in-order stream
+            incremental = IncrementalDetector() if self.incremental else None
+            marker_tracker = MarkerTracker() if self.track else None
+            if (self.incremental or self.track) and workers > 1:
+                print("⚠️  Incremental detection and tracking need frames in order, using 1 detector thread")
+                workers = 1
+            
+            process = partial(analyze_frame, reference_size=self.detection_reference_size,
+                              incremental=incremental, marker_tracker=marker_tracker)
+            pipeline = LivePipeline(self.grab_minimap, process, on_result,
+                                    fps=CAPTURE_FPS, queue_size=LIVE_QUEUE_SIZE,
+                                    workers=workers, policy=policy)
+            self.pipeline = pipeline
+            
+            print(f"\n⏱️  Capturing for {CAPTURE_DURATION}s ({workers} workers, {policy})...")
+            self.start_time = time.time()
+            stats = pipeline.run(duration=CAPTURE_DURATION, max_frames=CAPTURE_DURATION * CAPTURE_FPS,
+                                 should_stop=lambda: should_stop)
+            self.screenshots_captured = stats['processed']
+            
+            print(f"\n✅ Captured {stats['captured']}, processed {stats['processed']}, "
+                  f"dropped {stats['dropped']}, late {stats['late']}, no minimap {self.frames_skipped}")
+            session.report()
+            
+            if self.screenshots_captured > 0:
+                self.phase3_generate(session)
+            print("\n✅ DONE!")
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    def run_video(self, path, start=0.0, end=None, fps=CAPTURE_FPS, workers=PROCESS_WORKERS):
+        """Process a recorded match directly from the video file"""
+        try:
+            print("\n" + "=" * 70)
+            print("🎞️  VIDEO: " + str(path))
+            print("=" * 70)
+            
+            source = VideoSource(path, start=start, end=end, fps=fps, locator=self.locator)
+            print(f"   {source.native_fps:.2f} fps source, sampling every {source.step} frames ({source.sample_fps:.2f} fps)")
+            
+            # Sample timestamps keep the --start offset and the gaps left by
+            # frames without a minimap
+            timestamps = {}
+            
+            def frames():
+                for idx, timestamp, minimap in source:
+                    # Re-detected boxes drift by a few px; keep the first crop's size
+                    minimap = self.fit_capture_size(minimap)
+                    if minimap is None:
+                        continue
+                    timestamps[idx] = timestamp
+                    yield idx, minimap
+            
+            session = self.process_frames(frames(), workers=workers, fps=source.sample_fps,
+                                          timestamps=timestamps)
+            self.screenshots_captured = session.frames
+            self.minimap_region = self.locator.box
+            
+            print(f"   Decoded: {source.frames_decoded}, skipped: {source.frames_skipped}, "
+                  f"no minimap: {source.frames_without_minimap}, off-size: {self.frames_skipped}")
+            
+            if self.screenshots_captured > 0:
+                self.phase3_generate(session)
             print("\n✅ DONE!")
         except Exception as e:
             print(f"\n❌ Error: {e}")
@@ -372,5 +694,53 @@ class Tracker:
 
 
 if __name__ == '__main__':
-    tracker = Tracker()
-    tracker.run()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Pokemon Unite minimap tracker")
+    parser.add_argument('--video', help="process a recorded match instead of the live screen")
+    parser.add_argument('--start', type=float, default=0.0, help="video start time (s)")
+    parser.add_argument('--end', type=float, default=None, help="video end time (s)")
+    parser.add_argument('--fps', type=float, default=CAPTURE_FPS, help="video sample rate")
+    parser.add_argument('--workers', type=int, default=None, help="detector processes/threads")
+    parser.add_argument('--live', action='store_true', help="detect while capturing")
+    parser.add_argument('--policy', choices=POLICIES, default=LIVE_OVERLOAD_POLICY,
+                        help="live mode overload policy")
+    parser.add_argument('--preview', type=float, default=LIVE_PREVIEW_HZ,
+                        help="live mode: refresh outputs/heatmap_live.png this many times per second")
+    parser.add_argument('--serve', type=int, nargs='?', const=SERVICE_PORT,
+                        default=SERVICE_PORT if SERVE_LIVE_STATE else None,
+                        help=f"serve live state on 127.0.0.1 (default port {SERVICE_PORT})")
+    parser.add_argument('--profile', action='store_true', help="record per-stage detector timings")
+    parser.add_argument('--normalize', action='store_true', default=NORMALIZE_TO_REFERENCE,
+                        help="detect at the canonical scale, coordinates in reference-map space")
+    parser.add_argument('--incremental', action='store_true', default=INCREMENTAL_DETECTION,
+                        help="re-detect creeps/objectives only where the minimap changed")
+    parser.add_argument('--track', action='store_true', default=TRACK_MARKERS,
+                        help="track markers across frames (per-player trajectories)")
+    parser.add_argument('--batch', type=int, default=BATCH_FRAMES,
+                        help="detect over stacks of this many frames (offline processing)")
+    args = parser.parse_args()
+    
+    if args.profile:
+        instrumentation.enable(trace=True)
+    
+    tracker = Tracker(normalize=args.normalize, incremental=args.incremental, track=args.track,
+                      batch=args.batch)
+    if args.serve is not None:
+        tracker.start_service(args.serve)
+    
+    if args.live:
+        tracker.run_live(workers=args.workers or LIVE_WORKERS, policy=args.policy, preview_hz=args.preview)
+    elif args.video:
+        tracker.run_video(args.video, start=args.start, end=args.end, fps=args.fps,
+                          workers=args.workers or PROCESS_WORKERS)
+    else:
+        tracker.run(workers=args.workers or PROCESS_WORKERS)
+    tracker.stop_service()
+    
+    if args.profile:
+        print("\n⏱️  Detector stages:")
+        print(instrumentation.report())
+        trace_path = tracker.output_dir / f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        instrumentation.dump_trace(trace_path)
+        print(f"📊 {trace_path}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Offline video ingestion
+- Reads recorded matches (mp4/mkv/...) through cv2.VideoCapture
+- Start/end timestamps, every-Nth-frame or target-fps sampling
+- Skipped frames are only grabbed, never converted
+- Frames are cropped to the cached minimap box right after decode
+"""
+
+import cv2
+import numpy as np
+from typing import Iterator, Optional, Tuple
+
+from minimap_detector_final import MinimapLocator
+
+
+class VideoSource:
+    """
+    Iterate (sample_idx, timestamp_s, minimap) over a video file
+    With crop_to_minimap=False the full frame is yielded instead
+    """
+    
+    def __init__(self, path, start: float = 0.0, end: Optional[float] = None,
+                 every_n: Optional[int] = None, fps: Optional[float] = None,
+                 crop_to_minimap: bool = True, minimap_size: Optional[int] = None,
+                 locator: Optional[MinimapLocator] = None):
+        self.path = str(path)
+        self.start = start
+        self.end = end
+        self.crop_to_minimap = crop_to_minimap
+        self.minimap_size = minimap_size
+        self.locator = locator or MinimapLocator()
+        
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {self.path}")
+        self.native_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        
+        # Sampling step in source frames
+        if every_n is not None:
+            self.step = max(1, int(every_n))
+        elif fps is not None:
+            self.step = max(1, int(round(self.native_fps / fps)))
+        else:
+            self.step = 1
+        
+        self.frames_decoded = 0
+        self.frames_skipped = 0
+        self.frames_without_minimap = 0
+    
+    @property
+    def sample_fps(self) -> float:
+        return self.native_fps / self.step
+    
+    def _crop(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        box = self.locator.locate(frame)
+        if box is None:
+            return None
+        
+        x1, y1, x2, y2 = box
+        minimap = frame[y1:y2, x1:x2]
+        if self.minimap_size:
+            minimap = cv2.resize(minimap, (self.minimap_size, self.minimap_size),
+                                 interpolation=cv2.INTER_AREA)
+        return minimap
+    
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {self.path}")
+        
+        try:
+            start_frame = int(round(self.start * self.native_fps))
+            end_frame = int(round(self.end * self.native_fps)) if self.end is not None else None
+            if start_frame > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            
+            frame_idx = start_frame
+            sample_idx = 0
+            
+            while end_frame is None or frame_idx < end_frame:
+                # Decode only sampled frames; grab() just advances the stream
+                if (frame_idx - start_frame) % self.step:
+                    if not cap.grab():
+                        break
+                    self.frames_skipped += 1
+                    frame_idx += 1
+                    continue
+                
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                self.frames_decoded += 1
+                timestamp = frame_idx / self.native_fps
+                frame_idx += 1
+                
+                if self.crop_to_minimap:
+                    frame = self._crop(frame)
+                    if frame is None:
+                        self.frames_without_minimap += 1
+                        continue
+                
+                yield sample_idx, timestamp, frame
+                sample_idx += 1
+        finally:
+            cap.release()
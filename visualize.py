@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Debug overlays drawn from structured detector results
+- Detectors only return detections; nothing here runs unless an image is wanted
+- draw_* functions annotate the given image in place and return it
+- annotate() makes the single copy and draws everything requested
+
+Usage:
+    python visualize.py minimap.png [--out outputs/annotated.png]
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Iterable, Optional, Tuple
+
+# BGR
+TEAM_COLORS = {'orange': (0, 165, 255), 'purple': (255, 0, 255)}
+CENTER_COLOR = (0, 255, 0)
+CREEP_COLOR = (0, 255, 0)
+OBJECTIVE_COLOR = (0, 255, 255)
+MASK_COLOR = (255, 0, 0)
+BOX_COLOR = (0, 255, 0)
+
+
+def draw_markers(img: np.ndarray, markers: Iterable[Dict]) -> np.ndarray:
+    """Team-coloured ring + green centre per Pokemon marker"""
+    for marker in markers:
+        cx, cy = marker['position']
+        cv2.circle(img, (cx, cy), marker['radius'], TEAM_COLORS.get(marker['team'], CENTER_COLOR), 2)
+        cv2.circle(img, (cx, cy), 2, CENTER_COLOR, -1)
+    return img
+
+
+def draw_creeps(img: np.ndarray, creeps: Iterable[Dict]) -> np.ndarray:
+    for creep in creeps:
+        cv2.circle(img, tuple(creep['position']), 2, CREEP_COLOR, -1)
+    return img
+
+
+def draw_objectives(img: np.ndarray, objectives: Iterable[Dict]) -> np.ndarray:
+    for obj in objectives:
+        cv2.circle(img, tuple(obj['position']), 10, OBJECTIVE_COLOR, 2)
+    return img
+
+
+def draw_mask_outline(img: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Outline of a binary mask (e.g. the minimap oval)"""
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    cv2.drawContours(img, contours, -1, MASK_COLOR, 1)
+    return img
+
+
+def draw_minimap_box(img: np.ndarray, coords: Tuple[int, int, int, int],
+                     label: Optional[str] = None) -> np.ndarray:
+    """Detected minimap rectangle on a full screenshot"""
+    x1, y1, x2, y2 = coords
+    cv2.rectangle(img, (x1, y1), (x2, y2), BOX_COLOR, 3)
+    if label:
+        cv2.putText(img, label, (x1 - 20, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, BOX_COLOR, 2)
+    return img
+
+
+def annotate(img: np.ndarray, markers: Iterable[Dict] = (), creeps: Iterable[Dict] = (),
+             objectives: Iterable[Dict] = (), mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Copy of img with every given result drawn on it"""
+    out = img.copy()
+    if mask is not None:
+        draw_mask_outline(out, mask)
+    draw_creeps(out, creeps)
+    draw_objectives(out, objectives)
+    draw_markers(out, markers)
+    return out
+
+
+if __name__ == '__main__':
+    import argparse
+    from pathlib import Path
+    
+    from frame_context import analyze_frame, FrameContext
+    
+    parser = argparse.ArgumentParser(description="Annotate a minimap crop with all detections")
+    parser.add_argument('image')
+    parser.add_argument('--out', default=str(Path('outputs') / 'annotated.png'))
+    args = parser.parse_args()
+    
+    img = cv2.imread(args.image)
+    if img is None:
+        print(f"❌ Could not load {args.image}")
+        raise SystemExit(1)
+    
+    result = analyze_frame(img)
+    print(f"✅ {len(result['markers'])} markers, {len(result['creeps'])} creeps, "
+          f"{len(result['objectives'])} objectives")
+    
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(args.out, annotate(img, result['markers'], result['creeps'], result['objectives'],
+                                   mask=FrameContext(img).minimap_mask))
+    print(f"✅ Saved: {args.out}")